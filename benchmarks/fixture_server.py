@@ -0,0 +1,151 @@
+"""Local stand-in for the sites the scrapers talk to.
+
+Serves the recorded pages listed in fixtures/manifest.json over plain HTTP on
+127.0.0.1. FixtureAdapter is mounted on a requests session to send every
+https:// request there instead, keyed by host and path.
+"""
+import os
+import json
+import time
+import zlib
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import urlsplit, unquote, parse_qs
+
+from requests.adapters import HTTPAdapter
+
+FIXTURE_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'fixtures')
+
+# Any POST (Telegram sendMessage/editMessageText) gets this reply
+TELEGRAM_OK = json.dumps({'ok': True, 'result': {'message_id': 1}}).encode()
+
+
+def _spark_reply(query):
+    """A Yahoo spark payload for whichever symbols were asked for"""
+    symbols = parse_qs(query).get('symbols', [''])[0].split(',')
+    result = []
+    for symbol in filter(None, symbols):
+        # Stable made-up prices so repeated runs return the same bytes
+        previous = 100.0 + zlib.crc32(symbol.encode()) % 5000
+        price = round(previous * 1.004, 2)
+        result.append({'symbol': symbol, 'response': [{
+            'meta': {'symbol': symbol, 'currency': 'INR', 'regularMarketPrice': price,
+                     'chartPreviousClose': previous, 'regularMarketTime': 1760607000},
+            'timestamp': [1760607000],
+            'indicators': {'quote': [{'close': [price]}]}
+        }]})
+    return json.dumps({'spark': {'result': result, 'error': None}}).encode()
+
+
+# Endpoints whose reply depends on the query string, by host/path
+DYNAMIC = {
+    'query1.finance.yahoo.com/v7/finance/spark': _spark_reply,
+}
+
+
+def _make_handler(fixtures, latency):
+    class FixtureHandler(BaseHTTPRequestHandler):
+        protocol_version = 'HTTP/1.1'
+        # Headers and body go out in separate writes; don't let Nagle hold the body
+        disable_nagle_algorithm = True
+
+        def do_GET(self):
+            time.sleep(latency)
+            parts = urlsplit(self.path)
+            path = unquote(parts.path).lstrip('/')
+            if path in DYNAMIC:
+                self._reply(200, DYNAMIC[path](parts.query), 'application/json')
+                return
+            fixture = fixtures.get(path)
+            if fixture is None:
+                self._reply(404, b'not found', 'text/plain')
+                return
+            with open(fixture, 'rb') as f:
+                body = f.read()
+            content_type = 'application/json' if fixture.endswith('.json') else 'text/html; charset=utf-8'
+            self._reply(200, body, content_type)
+
+        def do_POST(self):
+            time.sleep(latency)
+            self.rfile.read(int(self.headers.get('Content-Length', 0)))
+            self._reply(200, TELEGRAM_OK, 'application/json')
+
+        def _reply(self, status, body, content_type):
+            self.send_response(status)
+            self.send_header('Content-Type', content_type)
+            self.send_header('Content-Length', str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+        def log_message(self, format, *args):
+            pass
+
+    return FixtureHandler
+
+
+class FixtureServer:
+    """Threaded HTTP server for the recorded fixtures"""
+
+    def __init__(self, fixture_dir=FIXTURE_DIR, latency=0.0):
+        with open(os.path.join(fixture_dir, 'manifest.json')) as f:
+            manifest = json.load(f)
+        fixtures = {path: os.path.join(fixture_dir, name) for path, name in manifest.items()}
+        self._server = ThreadingHTTPServer(('127.0.0.1', 0), _make_handler(fixtures, latency))
+        self._server.daemon_threads = True
+        self._thread = threading.Thread(target=self._server.serve_forever, daemon=True)
+
+    @property
+    def base_url(self):
+        return f"http://127.0.0.1:{self._server.server_port}"
+
+    def start(self):
+        self._thread.start()
+        return self
+
+    def stop(self):
+        self._server.shutdown()
+        self._server.server_close()
+
+
+class FixtureAdapter(HTTPAdapter):
+    """Transport adapter that rewrites https://host/path to the fixture server.
+
+    Records (seconds, bytes, status) for every request it sends in `fetches`.
+    """
+
+    def __init__(self, base_url, **kwargs):
+        super().__init__(**kwargs)
+        self.base_url = base_url
+        self.fetches = []
+        self._lock = threading.Lock()
+
+    def send(self, request, **kwargs):
+        parts = urlsplit(request.url)
+        request.url = f"{self.base_url}/{parts.hostname}{parts.path}"
+        if parts.query:
+            request.url += f"?{parts.query}"
+
+        start = time.perf_counter()
+        response = super().send(request, **kwargs)
+        size = len(response.content)  # count the body download as fetch time
+        elapsed = time.perf_counter() - start
+
+        with self._lock:
+            self.fetches.append((elapsed, size, response.status_code))
+        return response
+
+    def reset(self):
+        with self._lock:
+            self.fetches = []
+
+
+def route_session(session, base_url):
+    """Send all of a session's https:// traffic to the fixture server"""
+    # Every host shares this one adapter (and its 127.0.0.1 pool), so give it
+    # room for the largest per-host pool it replaces
+    pool_maxsize = max([getattr(a, '_pool_maxsize', 10) for a in session.adapters.values()] + [10])
+    adapter = FixtureAdapter(base_url, pool_maxsize=pool_maxsize)
+    # Replace per-host adapters too, or their longer prefixes would win
+    for prefix in [prefix for prefix in session.adapters if prefix.startswith('https://')] + ['https://']:
+        session.mount(prefix, adapter)
+    return adapter
@@ -0,0 +1,212 @@
+"""Offline benchmarks for every data source and the full report pipeline.
+
+    python benchmarks/run_benchmarks.py                  # every target
+    python benchmarks/run_benchmarks.py finlive nse_vix  # selected targets
+    python benchmarks/run_benchmarks.py --latency 0.05   # simulate a slow network
+    python benchmarks/run_benchmarks.py --json out.json  # keep the raw numbers
+
+All traffic goes to a local FixtureServer, so no live site is touched. Each
+target runs in its own subprocess so peak RSS is reported per target.
+"""
+import os
+import sys
+import json
+import time
+import argparse
+import tempfile
+import resource
+import statistics
+import subprocess
+import tracemalloc
+import contextlib
+
+BENCH_DIR = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, os.path.join(os.path.dirname(BENCH_DIR), 'src'))
+sys.path.insert(0, BENCH_DIR)
+
+from fixture_server import FixtureServer, route_session
+from fanout import is_valid
+
+
+def _market_scraper(use_cache):
+    import market_scraper
+    scraper = market_scraper.MarketDataScraper()
+    # Every host is the local fixture server, so back-to-back iterations
+    # need no politeness gap
+    scraper.session.politeness = None
+    if not use_cache:
+        # Every call revalidates, and the fixtures carry no validators,
+        # so each one is a full fetch
+        scraper.session.ttls = {}
+        scraper.session.default_ttl = 0
+    return scraper, [scraper.session, scraper.delivery.session]
+
+
+def _nse_scraper(use_cache):
+    import scraper
+    nse_scraper = scraper.MarketDataScraper()
+    return nse_scraper, [nse_scraper.session]
+
+
+def _nse_pipeline(nse_scraper):
+    from analyzer import MarketAnalyzer
+    nse_scraper.refresh_indices()
+    nifty_data = nse_scraper.get_nifty_data()
+    vix_data = nse_scraper.get_nifty_vix()
+    mmi_data = nse_scraper.get_mmi_data()
+    return MarketAnalyzer().analyze_market_condition(nifty_data, vix_data, mmi_data)
+
+
+def _pipeline(scraper):
+    # Back-to-back iterations would otherwise wait out Telegram's 1 msg/s per-chat limit
+    scraper.delivery.reset_limits()
+    return scraper.run()
+
+
+def _watchlist(size):
+    symbols = tuple(f"STOCK{i}.NS" for i in range(size))
+    return lambda s: s.get_watchlist_quotes(symbols)
+
+
+def _fresh_indices(method):
+    def call(nse_scraper):
+        nse_scraper.refresh_indices()
+        return getattr(nse_scraper, method)()
+    return call
+
+
+def _extracted(*fields):
+    """Check that a source's result dict has a usable value for every field"""
+    return lambda result: result is not None and all(is_valid(result.get(field)) for field in fields)
+
+
+def _all_quoted(quotes):
+    return bool((quotes.price == quotes.price).all())
+
+
+# name -> (kind, factory, call, check); check(result) says whether the call
+# produced what it should, so a fast-but-broken target doesn't look good
+TARGETS = {
+    'finlive': ('source', _market_scraper, lambda s: s.get_nifty_data_from_finlive(), _extracted('pe_ratio')),
+    'trendlyne': ('source', _market_scraper, lambda s: s.get_nifty_data_from_trendlyne(),
+                  _extracted('price', 'pe_ratio')),
+    'screener': ('source', _market_scraper, lambda s: s.get_nifty_data_from_screener(),
+                 _extracted('price', 'pe_ratio')),
+    'yahoo': ('source', _market_scraper, lambda s: s.get_nifty_data_from_api(), _extracted('price')),
+    'quotes_1': ('source', _market_scraper, _watchlist(1), _all_quoted),
+    'quotes_300': ('source', _market_scraper, _watchlist(300), _all_quoted),
+    'tickertape': ('source', _market_scraper, lambda s: s.get_mmi_data_from_tickertape(), _extracted('value')),
+    'goodreturns': ('source', _market_scraper, lambda s: s.get_mmi_data_from_goodreturns(), _extracted('value')),
+    'nse_nifty': ('source', _nse_scraper, _fresh_indices('get_nifty_data'), _extracted('current_price')),
+    'nse_vix': ('source', _nse_scraper, _fresh_indices('get_nifty_vix'), _extracted('current_value')),
+    'nse_mmi': ('source', _nse_scraper, lambda s: s.get_mmi_data(), _extracted('mmi_value')),
+    'moneycontrol': ('source', _nse_scraper, lambda s: s._scrape_nifty_fallback(), _extracted('current_price')),
+    'pipeline': ('pipeline', _market_scraper, _pipeline, lambda sent: sent is True),
+    'nse_pipeline': ('pipeline', _nse_scraper, _nse_pipeline, _extracted('recommendation')),
+}
+
+
+def run_target(name, iterations, latency, use_cache):
+    """Benchmark one target in this process and return its numbers"""
+    kind, factory, call, check = TARGETS[name]
+    server = FixtureServer(latency=latency).start()
+    try:
+        with contextlib.redirect_stdout(open(os.devnull, 'w')):
+            instance, sessions = factory(use_cache)
+            adapters = [route_session(session, server.base_url) for session in sessions]
+            result = call(instance)  # warm-up: imports, connection pool
+
+            walls, fetches = [], []
+            for _ in range(iterations):
+                for adapter in adapters:
+                    adapter.reset()
+                start = time.perf_counter()
+                call(instance)
+                walls.append(time.perf_counter() - start)
+                fetches.append([fetch for adapter in adapters for fetch in adapter.fetches])
+
+            tracemalloc.start()
+            call(instance)
+            current, peak = tracemalloc.get_traced_memory()
+            blocks = sum(stat.count for stat in tracemalloc.take_snapshot().statistics('filename'))
+            tracemalloc.stop()
+    finally:
+        server.stop()
+
+    wall_ms = statistics.median(walls) * 1000
+    fetch_ms = statistics.median(sum(f[0] for f in calls) for calls in fetches) * 1000
+    return {
+        'target': name,
+        'kind': kind,
+        'ok': check(result),
+        'wall_ms': round(wall_ms, 2),
+        'fetch_ms': round(fetch_ms, 2),
+        # Fetches overlap in the concurrent pipelines, so wall - fetch means nothing there
+        'parse_ms': round(max(wall_ms - fetch_ms, 0.0), 2) if kind == 'source' else None,
+        'requests': statistics.median(len(calls) for calls in fetches),
+        'bytes': statistics.median(sum(f[1] for f in calls) for calls in fetches),
+        'alloc_peak_kb': round(peak / 1024, 1),
+        'alloc_blocks': blocks,
+        'peak_rss_mb': round(resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024, 1),
+    }
+
+
+def _run_in_subprocess(name, args):
+    env = dict(os.environ)
+    env.update({
+        'MARKET_BOT_STATE_DIR': tempfile.mkdtemp(prefix='bench-state-'),
+        'TELEGRAM_BOT_TOKEN': 'bench-token',
+        'TELEGRAM_CHAT_ID': '1',
+    })
+    command = [
+        sys.executable, os.path.abspath(__file__), '--child', name,
+        '--iterations', str(args.iterations), '--latency', str(args.latency)
+    ]
+    if args.cache:
+        command.append('--cache')
+    completed = subprocess.run(command, env=env, capture_output=True, text=True)
+    if completed.returncode != 0:
+        return {'target': name, 'error': completed.stderr.strip().splitlines()[-1:]}
+    return json.loads(completed.stdout.strip().splitlines()[-1])
+
+
+def _print_table(results):
+    columns = ('target', 'ok', 'wall_ms', 'fetch_ms', 'parse_ms', 'requests', 'bytes',
+               'alloc_peak_kb', 'alloc_blocks', 'peak_rss_mb')
+    print(' '.join(f"{column:>13}" for column in columns))
+    for result in results:
+        if 'error' in result:
+            print(f"{result['target']:>13} ERROR {result['error']}")
+            continue
+        cells = ('-' if result[column] is None else result[column] for column in columns)
+        print(' '.join(f"{cell:>13}" for cell in cells))
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('targets', nargs='*', help=f"subset of: {', '.join(TARGETS)}")
+    parser.add_argument('--iterations', type=int, default=20)
+    parser.add_argument('--latency', type=float, default=0.0, help='seconds the fixture server waits per request')
+    parser.add_argument('--cache', action='store_true', help='leave the HTTP cache TTLs on')
+    parser.add_argument('--json', help='write results to this file')
+    parser.add_argument('--child', help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.child:
+        print(json.dumps(run_target(args.child, args.iterations, args.latency, args.cache)))
+        return
+
+    unknown = set(args.targets) - set(TARGETS)
+    if unknown:
+        parser.error(f"unknown targets: {', '.join(sorted(unknown))}")
+
+    results = [_run_in_subprocess(name, args) for name in args.targets or TARGETS]
+    _print_table(results)
+
+    if args.json:
+        with open(args.json, 'w') as f:
+            json.dump(results, f, indent=2)
+
+
+if __name__ == '__main__':
+    main()
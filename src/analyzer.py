@@ -1,13 +1,142 @@
 import logging
+import operator
+from collections import namedtuple
+
+from snapshot import MarketSnapshot
+from zones import Zones, above, NIFTY_ZONES, VIX_ZONES, MMI_ZONES
 
 logger = logging.getLogger(__name__)
 
+# Reasoning line for each zone (see zones.py for the boundaries)
+VIX_REASONS = {
+    'low_volatility': "VIX below 15 indicates low volatility - market complacency",
+    'normal_volatility': "VIX in normal range - moderate volatility",
+    'high_volatility': "VIX above 25 indicates high volatility - market fear",
+}
+MMI_REASONS = {
+    'extreme_fear': "MMI below 25 - Extreme Fear zone",
+    'fear': "MMI below 40 - Fear zone",
+    'neutral': "MMI in neutral zone",
+    'greed': "MMI 60 or above - Greed zone",
+    'extreme_greed': "MMI 75 or above - Extreme Greed zone",
+}
+NIFTY_REASONS = {
+    'strong_bullish': "NIFTY up >2% - Strong bullish momentum",
+    'bullish': "NIFTY up >0.5% - Bullish trend",
+    'neutral': None,
+    'bearish': "NIFTY down >0.5% - Bearish trend",
+    'strong_bearish': "NIFTY down >2% - Strong bearish momentum",
+}
+
+# Equity score contribution of each signal (MMI is read contrarian)
+NIFTY_WEIGHTS = {'strong_bullish': 2, 'bullish': 1, 'neutral': 0, 'bearish': -1, 'strong_bearish': -2}
+VIX_WEIGHTS = {'low_volatility': 1, 'normal_volatility': 0, 'high_volatility': -2}
+MMI_WEIGHTS = {'extreme_fear': 2, 'fear': 1, 'neutral': 0, 'greed': -1, 'extreme_greed': -2}
+
+# Signal codes in batch results are zone indexes, so they index into these
+NIFTY_SIGNALS = NIFTY_ZONES.labels
+VIX_SIGNALS = VIX_ZONES.labels
+MMI_SIGNALS = MMI_ZONES.labels
+
+# Recommendation categories from most bearish to most bullish; the cut-offs
+# are the lower bounds of the categories above the first. SELL/REDUCE is a
+# score of -3 or less and HOLD/REDUCE -1 or less, so those two categories
+# end at (not just below) their bound, which matters for fractional weights
+SCORE_CUTOFFS = (above(-3), above(-1), 1, 3)
+RECOMMENDATIONS = (
+    {
+        'market_condition': 'Bearish',
+        'recommendation': 'SELL/REDUCE',
+        'risk_level': 'High',
+        'asset_allocation': '30% Equity, 70% Debt'
+    },
+    {
+        'market_condition': 'Moderately Bearish',
+        'recommendation': 'HOLD/REDUCE',
+        'risk_level': 'Medium-High',
+        'asset_allocation': '40% Equity, 60% Debt'
+    },
+    {
+        'market_condition': 'Neutral',
+        'recommendation': 'HOLD',
+        'risk_level': 'Medium',
+        'asset_allocation': '50% Equity, 50% Debt'
+    },
+    {
+        'market_condition': 'Moderately Bullish',
+        'recommendation': 'ACCUMULATE',
+        'risk_level': 'Medium',
+        'asset_allocation': '60% Equity, 40% Debt'
+    },
+    {
+        'market_condition': 'Bullish',
+        'recommendation': 'BUY',
+        'risk_level': 'Medium',
+        'asset_allocation': '70% Equity, 30% Debt'
+    },
+)
+
+# Optional adjustments from streaming indicators (see indicators.py):
+# (indicator, comparison, threshold, score, reasoning); every match counts
+INDICATOR_RULES = (
+    ('sma_gap', operator.gt, 1, 1, "20-day average >1% above the 50-day - uptrend"),
+    ('sma_gap', operator.lt, -1, -1, "20-day average >1% below the 50-day - downtrend"),
+    ('rsi', operator.lt, 30, 1, "RSI below 30 - oversold"),
+    ('rsi', operator.gt, 70, -1, "RSI above 70 - overbought"),
+    ('vix_percentile', operator.gt, 90, -1, "VIX in the top 10% of the past year"),
+    ('mmi_roc', operator.lt, -25, 1, "MMI down >25% in 5 days - fear building fast"),
+    ('mmi_roc', operator.gt, 25, -1, "MMI up >25% in 5 days - greed building fast"),
+    ('pe_zscore', operator.gt, 2, -1, "PE over 2 standard deviations above its 1-year mean"),
+    ('pe_zscore', operator.lt, -2, 1, "PE over 2 standard deviations below its 1-year mean"),
+)
+
+BatchAnalysis = namedtuple('BatchAnalysis', ['nifty_signal', 'vix_signal', 'mmi_signal', 'score', 'category'])
+
+
+def indicator_adjustments(indicators, rules=INDICATOR_RULES):
+    """(score, reasons) from the indicator rules that apply; missing indicators are skipped"""
+    score, reasons = 0, []
+    for name, compare, threshold, points, reason in rules:
+        value = indicators.get(name)
+        if value is not None and compare(value, threshold):
+            score += points
+            reasons.append(reason)
+    return score, reasons
+
+
+def _weight_table(np, weights, signals):
+    """Weights as an array indexed by signal code; int32 (so sums can't wrap) unless a weight is fractional"""
+    values = [weights[signal] for signal in signals]
+    dtype = np.int32 if all(float(value).is_integer() for value in values) else np.float64
+    return np.array(values, dtype=dtype)
+
+
 class MarketAnalyzer:
-    def __init__(self):
-        pass
+    """Scores NIFTY trend, VIX and MMI into a recommendation.
+
+    The defaults are the shared zones and module-level tables; the
+    backtester passes other boundaries, weights and cut-offs. Custom zones
+    must keep the default labels so batch signal codes still index the
+    *_SIGNALS tuples.
+    """
+
+    def __init__(self, nifty_zones=NIFTY_ZONES, vix_zones=VIX_ZONES, mmi_zones=MMI_ZONES,
+                 nifty_weights=NIFTY_WEIGHTS, vix_weights=VIX_WEIGHTS, mmi_weights=MMI_WEIGHTS,
+                 score_cutoffs=SCORE_CUTOFFS):
+        self.nifty_zones = nifty_zones
+        self.vix_zones = vix_zones
+        self.mmi_zones = mmi_zones
+        self.nifty_weights = nifty_weights
+        self.vix_weights = vix_weights
+        self.mmi_weights = mmi_weights
+        self.score_zones = Zones(score_cutoffs, [r['recommendation'] for r in RECOMMENDATIONS])
+    
+    def analyze_market_condition(self, nifty_data, vix_data, mmi_data, indicators=None):
+        """Analyze scraper.py's NIFTY, VIX and MMI dicts (adapter for analyze_snapshot)"""
+        return self.analyze_snapshot(MarketSnapshot.from_nse(nifty_data, vix_data, mmi_data), indicators)
     
-    def analyze_market_condition(self, nifty_data, vix_data, mmi_data):
-        """Analyze market conditions and provide insights"""
+    def analyze_snapshot(self, snapshot, indicators=None):
+        """Analyze market conditions and provide insights, optionally adjusted by indicator values"""
         
         analysis = {
             'market_condition': '',
@@ -18,60 +147,25 @@ class MarketAnalyzer:
         }
         
         try:
-            # Analyze VIX
-            vix_value = float(vix_data['current_value']) if vix_data else 20
-            
-            if vix_value < 15:
-                analysis['reasoning'].append("VIX below 15 indicates low volatility - market complacency")
-                vix_signal = "low_volatility"
-            elif vix_value > 25:
-                analysis['reasoning'].append("VIX above 25 indicates high volatility - market fear")
-                vix_signal = "high_volatility"
-            else:
-                analysis['reasoning'].append("VIX in normal range - moderate volatility")
-                vix_signal = "normal_volatility"
+            # Analyze VIX (a missing reading counts as normal volatility)
+            vix_signal = self.vix_zones.classify(snapshot.vix)
+            analysis['reasoning'].append(VIX_REASONS[vix_signal])
             
             # Analyze MMI
-            mmi_signal = "neutral"
-            if mmi_data:
-                mmi_value = int(mmi_data['mmi_value']) if mmi_data['mmi_value'].isdigit() else 50
-                
-                if mmi_value < 25:
-                    analysis['reasoning'].append("MMI below 25 - Extreme Fear zone")
-                    mmi_signal = "extreme_fear"
-                elif mmi_value < 40:
-                    analysis['reasoning'].append("MMI below 40 - Fear zone")
-                    mmi_signal = "fear"
-                elif mmi_value > 75:
-                    analysis['reasoning'].append("MMI above 75 - Extreme Greed zone")
-                    mmi_signal = "extreme_greed"
-                elif mmi_value > 60:
-                    analysis['reasoning'].append("MMI above 60 - Greed zone")
-                    mmi_signal = "greed"
-                else:
-                    analysis['reasoning'].append("MMI in neutral zone")
-                    mmi_signal = "neutral"
+            mmi_signal = self.mmi_zones.classify(snapshot.mmi)
+            if snapshot.mmi is not None:
+                analysis['reasoning'].append(MMI_REASONS[mmi_signal])
             
             # Analyze NIFTY trend
-            nifty_signal = "neutral"
-            if nifty_data:
-                change_percent = float(nifty_data['change_percent'].replace('%', '')) if '%' in str(nifty_data['change_percent']) else 0
-                
-                if change_percent > 2:
-                    analysis['reasoning'].append("NIFTY up >2% - Strong bullish momentum")
-                    nifty_signal = "strong_bullish"
-                elif change_percent > 0.5:
-                    analysis['reasoning'].append("NIFTY up >0.5% - Bullish trend")
-                    nifty_signal = "bullish"
-                elif change_percent < -2:
-                    analysis['reasoning'].append("NIFTY down >2% - Strong bearish momentum")
-                    nifty_signal = "strong_bearish"
-                elif change_percent < -0.5:
-                    analysis['reasoning'].append("NIFTY down >0.5% - Bearish trend")
-                    nifty_signal = "bearish"
+            nifty_signal = self.nifty_zones.classify(snapshot.nifty_change_pct)
+            if NIFTY_REASONS[nifty_signal]:
+                analysis['reasoning'].append(NIFTY_REASONS[nifty_signal])
+            
+            if indicators:
+                analysis['reasoning'].extend(indicator_adjustments(indicators)[1])
             
             # Combine signals for final recommendation
-            analysis.update(self._get_recommendation(nifty_signal, vix_signal, mmi_signal))
+            analysis.update(self._get_recommendation(nifty_signal, vix_signal, mmi_signal, indicators))
             
         except Exception as e:
             logger.error(f"Error in market analysis: {e}")
@@ -84,71 +178,38 @@ class MarketAnalyzer:
         
         return analysis
     
-    def _get_recommendation(self, nifty_signal, vix_signal, mmi_signal):
+    def _get_recommendation(self, nifty_signal, vix_signal, mmi_signal, indicators=None):
         """Generate recommendation based on combined signals"""
         
         # Scoring system
-        equity_score = 0
+        equity_score = self.nifty_weights[nifty_signal] + self.vix_weights[vix_signal] + self.mmi_weights[mmi_signal]
+        if indicators:
+            equity_score += indicator_adjustments(indicators)[0]
         
-        # NIFTY signals
-        if nifty_signal == "strong_bullish":
-            equity_score += 2
-        elif nifty_signal == "bullish":
-            equity_score += 1
-        elif nifty_signal == "strong_bearish":
-            equity_score -= 2
-        elif nifty_signal == "bearish":
-            equity_score -= 1
+        # Generate recommendation
+        return dict(RECOMMENDATIONS[self.score_zones.index(equity_score)])
+    
+    def analyze_batch(self, change_pct, vix, mmi):
+        """Score many snapshots at once from NumPy arrays (NaN counts as a neutral reading).
         
-        # VIX signals
-        if vix_signal == "low_volatility":
-            equity_score += 1
-        elif vix_signal == "high_volatility":
-            equity_score -= 2
+        Returns a BatchAnalysis of arrays: int8 signal codes indexing
+        NIFTY_SIGNALS/VIX_SIGNALS/MMI_SIGNALS, the equity score, and the int8
+        category indexing RECOMMENDATIONS. Row for row this matches
+        _get_recommendation, without building any reasoning text.
+        """
+        import numpy as np
         
-        # MMI signals
-        if mmi_signal == "extreme_fear":
-            equity_score += 2  # Contrarian signal
-        elif mmi_signal == "fear":
-            equity_score += 1
-        elif mmi_signal == "extreme_greed":
-            equity_score -= 2
-        elif mmi_signal == "greed":
-            equity_score -= 1
+        change_pct, vix, mmi = (np.asarray(values, dtype=np.float64) for values in (change_pct, vix, mmi))
         
-        # Generate recommendation
-        if equity_score >= 3:
-            return {
-                'market_condition': 'Bullish',
-                'recommendation': 'BUY',
-                'risk_level': 'Medium',
-                'asset_allocation': '70% Equity, 30% Debt'
-            }
-        elif equity_score >= 1:
-            return {
-                'market_condition': 'Moderately Bullish',
-                'recommendation': 'ACCUMULATE',
-                'risk_level': 'Medium',
-                'asset_allocation': '60% Equity, 40% Debt'
-            }
-        elif equity_score <= -3:
-            return {
-                'market_condition': 'Bearish',
-                'recommendation': 'SELL/REDUCE',
-                'risk_level': 'High',
-                'asset_allocation': '30% Equity, 70% Debt'
-            }
-        elif equity_score <= -1:
-            return {
-                'market_condition': 'Moderately Bearish',
-                'recommendation': 'HOLD/REDUCE',
-                'risk_level': 'Medium-High',
-                'asset_allocation': '40% Equity, 60% Debt'
-            }
-        else:
-            return {
-                'market_condition': 'Neutral',
-                'recommendation': 'HOLD',
-                'risk_level': 'Medium',
-                'asset_allocation': '50% Equity, 50% Debt'
-            }
+        nifty_signal = self.nifty_zones.index_array(change_pct)
+        vix_signal = self.vix_zones.index_array(vix)
+        mmi_signal = self.mmi_zones.index_array(mmi)
+        
+        score = (
+            _weight_table(np, self.nifty_weights, NIFTY_SIGNALS)[nifty_signal]
+            + _weight_table(np, self.vix_weights, VIX_SIGNALS)[vix_signal]
+            + _weight_table(np, self.mmi_weights, MMI_SIGNALS)[mmi_signal]
+        )
+        category = self.score_zones.index_array(score)
+        
+        return BatchAnalysis(nifty_signal, vix_signal, mmi_signal, score, category)
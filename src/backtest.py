@@ -0,0 +1,217 @@
+"""Replay stored history through MarketAnalyzer for grids of rule settings.
+
+    python src/backtest.py                            # default grid over the local history
+    python src/backtest.py --grid grid.json --top 20  # your own grid
+    python src/backtest.py --workers 8 --json out.json
+
+The recommendation at each day's close sets the equity share of the
+allocation (30-70%, as in RECOMMENDATIONS) for the next day; the rest earns
+a fixed debt rate. Every configuration is scored on total return, CAGR, max
+drawdown and turnover. A grid file is a JSON object mapping parameter names
+(see DEFAULTS) to lists of values; every combination is tried. Score
+cut-offs are the inclusive lower bounds of HOLD/REDUCE, HOLD, ACCUMULATE and
+BUY, so with fractional weights use a value just above -3 (not -2) to keep
+"-3 or less is SELL/REDUCE".
+"""
+import os
+import json
+import argparse
+import itertools
+from datetime import datetime
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+
+from analyzer import (
+    MarketAnalyzer, RECOMMENDATIONS, NIFTY_WEIGHTS, VIX_WEIGHTS, MMI_WEIGHTS, SCORE_CUTOFFS
+)
+from zones import above, nifty_zones, vix_zones, mmi_zones
+from history_store import HistoryStore
+from state_dir import IST, state_path
+
+TRADING_DAYS = 250
+DEBT_RATE = 0.065
+
+# Equity share of each recommendation category, from its asset_allocation text
+EQUITY_SHARES = np.array([int(r['asset_allocation'].split('%')[0]) / 100 for r in RECOMMENDATIONS])
+
+# The analyzer's current settings (the zones.py defaults); a grid overrides any of these
+DEFAULTS = {
+    'nifty_bullish': 0.5,
+    'nifty_strong': 2,
+    'vix_low': 15,
+    'vix_high': 25,
+    'mmi_extreme_fear': 25,
+    'mmi_fear': 40,
+    'mmi_greed': 60,
+    'mmi_extreme_greed': 75,
+    'nifty_weight': 1,
+    'vix_weight': 1,
+    'mmi_weight': 1,
+    'score_cutoffs': SCORE_CUTOFFS,
+}
+
+DEFAULT_GRID = {
+    'nifty_strong': [1.5, 2, 2.5],
+    'vix_low': [12, 13, 14, 15, 16],
+    'vix_high': [22, 25, 28, 30],
+    'mmi_fear': [35, 40, 45],
+    'mmi_greed': [55, 60, 65],
+    'mmi_weight': [0, 1, 2],
+    'score_cutoffs': [SCORE_CUTOFFS, (above(-4), above(-2), 1, 4), (above(-2), above(-1), 1, 2)],
+}
+
+
+def expand_grid(grid):
+    """Every combination of the grid's values, each merged over DEFAULTS"""
+    unknown = set(grid) - set(DEFAULTS)
+    if unknown:
+        raise ValueError(f"Unknown backtest parameters: {', '.join(sorted(unknown))}")
+    names = sorted(grid)
+    configs = []
+    for values in itertools.product(*(grid[name] for name in names)):
+        config = dict(DEFAULTS, **dict(zip(names, values)))
+        config['score_cutoffs'] = tuple(config['score_cutoffs'])
+        configs.append(config)
+    return configs
+
+
+def build_analyzer(config):
+    """A MarketAnalyzer using one configuration's zone boundaries, weights and cut-offs"""
+    return MarketAnalyzer(
+        nifty_zones=nifty_zones(config['nifty_bullish'], config['nifty_strong']),
+        vix_zones=vix_zones(config['vix_low'], config['vix_high']),
+        mmi_zones=mmi_zones(
+            config['mmi_extreme_fear'], config['mmi_fear'], config['mmi_greed'], config['mmi_extreme_greed']
+        ),
+        nifty_weights={s: w * config['nifty_weight'] for s, w in NIFTY_WEIGHTS.items()},
+        vix_weights={s: w * config['vix_weight'] for s, w in VIX_WEIGHTS.items()},
+        mmi_weights={s: w * config['mmi_weight'] for s, w in MMI_WEIGHTS.items()},
+        score_cutoffs=config['score_cutoffs'],
+    )
+
+
+def load_daily(history):
+    """The last snapshot of each IST day as float64 arrays (NaN where missing)"""
+    by_day = {}
+    for row in history.range(fields=('nifty_price', 'nifty_change_pct', 'vix', 'mmi')):
+        if row['nifty_price'] is not None:
+            by_day[datetime.fromtimestamp(row['ts'], IST).date()] = row
+    days = sorted(by_day)
+
+    def column(field):
+        return np.array([by_day[day][field] for day in days], dtype=np.float64)
+
+    price = column('nifty_price')
+    change_pct = column('nifty_change_pct')
+    # Sources without a change % still give a close-to-close move
+    computed = np.full(len(price), np.nan)
+    computed[1:] = (price[1:] / price[:-1] - 1) * 100
+    change_pct = np.where(np.isnan(change_pct), computed, change_pct)
+
+    return {
+        'days': [day.isoformat() for day in days],
+        'price': price,
+        'change_pct': change_pct,
+        'vix': column('vix'),
+        'mmi': column('mmi'),
+    }
+
+
+def evaluate(equity_share, price, debt_rate=DEBT_RATE):
+    """Performance of holding `equity_share[t]` in NIFTY from close t to close t+1"""
+    share = equity_share[:-1]
+    daily = share * (price[1:] / price[:-1] - 1) + (1 - share) * debt_rate / TRADING_DAYS
+    curve = np.cumprod(1 + daily)
+    peaks = np.maximum.accumulate(np.concatenate(([1.0], curve)))[1:]
+    years = max(len(daily), 1) / TRADING_DAYS
+    total = curve[-1] if len(curve) else 1.0
+    changes = np.abs(np.diff(share))
+    return {
+        'total_return': round(float(total - 1), 6),
+        'cagr': round(float(total ** (1 / years) - 1), 6),
+        'max_drawdown': round(float(np.max(1 - curve / peaks, initial=0.0)), 6),
+        'turnover': round(float(changes.sum() / years), 6),
+        'switches': int(np.count_nonzero(changes)),
+    }
+
+
+def backtest(config, data, debt_rate=DEBT_RATE):
+    """Score one configuration over the daily data"""
+    batch = build_analyzer(config).analyze_batch(data['change_pct'], data['vix'], data['mmi'])
+    return dict(evaluate(EQUITY_SHARES[batch.category], data['price'], debt_rate), config=config)
+
+
+# Each worker process gets the daily arrays once, not once per chunk
+_worker_data = None
+
+
+def _init_worker(data, debt_rate):
+    global _worker_data
+    _worker_data = (data, debt_rate)
+
+
+def _run_chunk(configs):
+    data, debt_rate = _worker_data
+    return [backtest(config, data, debt_rate) for config in configs]
+
+
+def run_grid(data, configs, workers=None, chunk_size=250, debt_rate=DEBT_RATE):
+    """Backtest every configuration across a process pool, results in input order"""
+    chunks = [configs[i:i + chunk_size] for i in range(0, len(configs), chunk_size)]
+    with ProcessPoolExecutor(max_workers=workers, initializer=_init_worker, initargs=(data, debt_rate)) as pool:
+        return [result for chunk in pool.map(_run_chunk, chunks) for result in chunk]
+
+
+def _print_results(baselines, results):
+    columns = ('total_return', 'cagr', 'max_drawdown', 'turnover', 'switches')
+    print(f"{'':>16} " + ' '.join(f"{column:>13}" for column in columns))
+    for label, result in baselines + [(f"#{rank}", result) for rank, result in enumerate(results, 1)]:
+        print(f"{label:>16} " + ' '.join(f"{result[column]:>13}" for column in columns))
+    for rank, result in enumerate(results, 1):
+        changed = {k: v for k, v in result['config'].items() if v != DEFAULTS[k]}
+        print(f"#{rank}: {changed or 'current settings'}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--db', help='history database (default: the bot\'s own)')
+    parser.add_argument('--grid', help='JSON file mapping parameters to lists of values')
+    parser.add_argument('--workers', type=int, help='worker processes (default: one per CPU)')
+    parser.add_argument('--sort', default='cagr', choices=('cagr', 'total_return', 'max_drawdown', 'turnover'))
+    parser.add_argument('--top', type=int, default=10)
+    parser.add_argument('--debt-rate', type=float, default=DEBT_RATE, help='annual return of the debt share')
+    parser.add_argument('--json', help='write every result to this file')
+    args = parser.parse_args()
+
+    history = HistoryStore(args.db or os.environ.get('HISTORY_DB_PATH') or state_path('history.sqlite3'))
+    data = load_daily(history)
+    history.close()
+    if len(data['days']) < 2:
+        parser.error("Need at least two days of history to backtest")
+
+    grid = DEFAULT_GRID
+    if args.grid:
+        with open(args.grid) as f:
+            grid = json.load(f)
+    configs = expand_grid(grid)
+    print(f"Backtesting {len(configs)} configurations over {len(data['days'])} days "
+          f"({data['days'][0]} to {data['days'][-1]})")
+
+    results = run_grid(data, configs, workers=args.workers, debt_rate=args.debt_rate)
+    # Returns rank highest first, risk and churn lowest first
+    results.sort(key=lambda result: result[args.sort], reverse=args.sort in ('cagr', 'total_return'))
+
+    baselines = [
+        ('buy and hold', evaluate(np.ones(len(data['price'])), data['price'], args.debt_rate)),
+        ('current rules', backtest(dict(DEFAULTS), data, args.debt_rate)),
+    ]
+    _print_results(baselines, results[:args.top])
+
+    if args.json:
+        with open(args.json, 'w') as f:
+            json.dump(results, f, indent=2)
+
+
+if __name__ == "__main__":
+    main()
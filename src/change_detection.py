@@ -0,0 +1,117 @@
+import json
+import hashlib
+import logging
+from datetime import datetime
+
+from snapshot import to_number
+from state_dir import IST, atomic_write
+
+logger = logging.getLogger(__name__)
+
+# Smallest move in each value that is worth telling anyone about
+MATERIAL_CHANGE = {
+    'nifty_price': 5.0,
+    'nifty_change_pct': 0.05,
+    'pe_ratio': 0.05,
+    'vix': 0.1,
+    'mmi': 1.0,
+}
+
+
+class ReportTracker:
+    """Remembers the last report sent so unchanged snapshots can be skipped.
+
+    Snapshots are fingerprinted after rounding every value to its
+    MATERIAL_CHANGE step, so noise below that step doesn't count as a change.
+    The fingerprint and message id are kept per chat, so a changed snapshot
+    later the same (IST) day can edit the earlier message instead of posting
+    a new one, and a chat that missed a report gets it on the next try.
+    """
+
+    def __init__(self, path, tolerances=MATERIAL_CHANGE):
+        self.path = path
+        self.tolerances = tolerances
+        self._state = self._load()
+
+    def _load(self):
+        try:
+            with open(self.path) as f:
+                return json.load(f)
+        except (OSError, ValueError):
+            return {}
+
+    def fingerprint(self, values):
+        """Hash of the snapshot with each value rounded to its material step"""
+        normalized = {}
+        for field, step in sorted(self.tolerances.items()):
+            number = to_number(values.get(field))
+            normalized[field] = None if number is None else round(number / step)
+        return hashlib.sha1(json.dumps(normalized, sort_keys=True).encode()).hexdigest()
+
+    def _today(self):
+        """State of today's (IST) reports, or {} if none was sent today"""
+        if self._state.get('day') != datetime.now(IST).date().isoformat():
+            return {}
+        return self._state
+
+    def pending(self, fingerprint, chat_ids):
+        """Chats that haven't been sent the report with this fingerprint today"""
+        delivered = self._today().get('fingerprints', {})
+        return [chat_id for chat_id in chat_ids if delivered.get(str(chat_id)) != fingerprint]
+
+    def messages_for_today(self):
+        """{chat_id: message_id} of today's report, or {} if none was sent today"""
+        return self._today().get('messages', {})
+
+    def remember(self, fingerprint, messages):
+        """Record which chats were just sent this fingerprint; `messages` maps chat_id to message_id.
+
+        Chats not in `messages` keep today's message id and fingerprint, so a
+        chat whose delivery failed is still pending on the next tick.
+        """
+        today = self._today()
+        self._state = {
+            'day': datetime.now(IST).date().isoformat(),
+            'messages': dict(today.get('messages', {}), **messages),
+            'fingerprints': dict(today.get('fingerprints', {}), **{chat_id: fingerprint for chat_id in messages})
+        }
+        atomic_write(self.path, json.dumps(self._state))
+
+
+def deliver_update(delivery, tracker, chat_ids, text, values):
+    """Send `text` only if `values` changed materially, editing today's message in place.
+
+    Returns (delivered, changed): `delivered` is True when every chat has the
+    current report, including when nothing needed sending.
+    """
+    fingerprint = tracker.fingerprint(values)
+    previous = tracker.messages_for_today()
+    # Every chat gets the first report of a day, even if the market hasn't moved,
+    # and a chat whose last delivery failed is tried again
+    targets = tracker.pending(fingerprint, chat_ids)
+    if not targets:
+        logger.info("No material change since the last report; nothing sent")
+        return True, False
+
+    futures = {}
+    for chat_id in targets:
+        message_id = previous.get(str(chat_id))
+        if message_id is None:
+            futures[chat_id] = delivery.send_message(chat_id, text)
+        else:
+            futures[chat_id] = delivery.edit_message(chat_id, message_id, text)
+
+    messages = {}
+    for chat_id, future in futures.items():
+        result = future.result()
+        if result is None and str(chat_id) in previous:
+            # The old message may be gone or too old to edit; post a fresh one
+            result = delivery.send_message(chat_id, text).result()
+        if isinstance(result, dict):
+            messages[str(chat_id)] = result.get('message_id')
+        elif result is not None:
+            messages[str(chat_id)] = previous.get(str(chat_id))
+
+    if messages:
+        tracker.remember(fingerprint, messages)
+    return len(messages) == len(futures), True
@@ -0,0 +1,123 @@
+"""Long-running scheduler for the market bot.
+
+    python src/daemon.py                      # daily report + intraday polls
+    python src/daemon.py --poll-minutes 5     # poll more often
+    python src/daemon.py --quiet-intraday     # record intraday polls, don't send them
+    python src/daemon.py --no-delta           # post every report, even unchanged ones
+    python src/daemon.py --hedged             # fewer requests to redundant sources
+
+One MarketDataScraper lives for the whole process, so its HTTP connection
+pools, cookies, cache index, source health and history database stay warm
+between ticks and each tick costs only one round of fetches. By default the
+scraper runs in delta mode: a tick whose values haven't moved sends nothing,
+and one that has edits the day's message in place.
+"""
+import signal
+import logging
+import argparse
+import threading
+from datetime import datetime, time as dtime, timedelta
+
+from market_scraper import MarketDataScraper
+from state_dir import IST
+
+logging.basicConfig(
+    level=logging.INFO,
+    format='%(asctime)s - %(name)s - %(levelname)s - %(message)s'
+)
+logger = logging.getLogger(__name__)
+
+# NSE cash market hours, IST
+MARKET_OPEN = dtime(9, 15)
+MARKET_CLOSE = dtime(15, 30)
+
+# Same slot as the scheduled GitHub workflow (04:00 UTC)
+DAILY_REPORT_AT = dtime(9, 30)
+
+
+class MarketDaemon:
+    """Runs the daily report and market-hours polls on one warm scraper"""
+
+    def __init__(self, scraper=None, poll_interval=15 * 60, report_time=DAILY_REPORT_AT, send_intraday=True):
+        self.scraper = scraper or MarketDataScraper(delta=True)
+        self.poll_interval = poll_interval
+        self.report_time = report_time
+        self.send_intraday = send_intraday
+        self._stop = threading.Event()
+
+    def next_report_time(self, now):
+        """Next daily report slot strictly after `now`"""
+        report_at = datetime.combine(now.date(), self.report_time, tzinfo=IST)
+        if report_at <= now:
+            report_at += timedelta(days=1)
+        return report_at
+
+    def next_poll_time(self, now):
+        """Next poll slot strictly after `now`, on a weekday within market hours"""
+        day = now.date()
+        while True:
+            if day.weekday() < 5:
+                slot = datetime.combine(day, MARKET_OPEN, tzinfo=IST)
+                close = datetime.combine(day, MARKET_CLOSE, tzinfo=IST)
+                if slot <= now:
+                    elapsed = (now - slot).total_seconds()
+                    slot += timedelta(seconds=(elapsed // self.poll_interval + 1) * self.poll_interval)
+                if slot <= close:
+                    return slot
+            day += timedelta(days=1)
+
+    def run_forever(self):
+        """Sleep until the next job, run it, repeat until stop() is called"""
+        logger.info("Market daemon started")
+        while not self._stop.is_set():
+            now = datetime.now(IST)
+            job, due = 'report', self.next_report_time(now)
+            if self.poll_interval:
+                poll_at = self.next_poll_time(now)
+                if poll_at < due:
+                    job, due = 'poll', poll_at
+
+            logger.info(f"Next {job} at {due.isoformat()}")
+            if self._stop.wait((due - now).total_seconds()):
+                break
+            self._run_job(job)
+        logger.info("Market daemon stopped")
+
+    def _run_job(self, job):
+        try:
+            if job == 'report':
+                self.scraper.run()
+            else:
+                self.scraper.poll(send=self.send_intraday)
+        except Exception as e:
+            # A bad tick must never take the daemon down
+            logger.error(f"Error running {job}: {e}")
+
+    def stop(self, *args):
+        self._stop.set()
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Run the market bot as a resident daemon')
+    parser.add_argument('--poll-minutes', type=float, default=15,
+                        help='minutes between intraday polls (0 disables polling)')
+    parser.add_argument('--quiet-intraday', action='store_true',
+                        help="record intraday snapshots without sending messages")
+    parser.add_argument('--no-delta', action='store_true',
+                        help="post a new message for every report instead of editing unchanged ones away")
+    parser.add_argument('--hedged', action='store_true',
+                        help="query redundant sources one at a time, hedging only when one is slow")
+    args = parser.parse_args()
+
+    daemon = MarketDaemon(
+        scraper=MarketDataScraper(delta=not args.no_delta, hedged=args.hedged),
+        poll_interval=int(args.poll_minutes * 60),
+        send_intraday=not args.quiet_intraday
+    )
+    signal.signal(signal.SIGTERM, daemon.stop)
+    signal.signal(signal.SIGINT, daemon.stop)
+    daemon.run_forever()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,112 @@
+import re
+
+
+def _plain_number(text):
+    """'24,512.30' -> '24512.30'"""
+    return text.replace(',', '')
+
+
+class ExtractionRule:
+    """Pull a value out of page text from a bounded window after an anchor.
+
+    The value pattern is only searched in the `window` characters following
+    each anchor match, so it can't wander off to an unrelated number far down
+    the page; a value running past the window's edge is read whole. `lower`/`upper` bound the converted value.
+    """
+
+    __slots__ = ('anchor', 'value', 'window', 'convert', 'lower', 'upper')
+
+    def __init__(self, anchor, value, window=80, flags=re.IGNORECASE,
+                 convert=str, lower=None, upper=None):
+        self.anchor = re.compile(anchor, flags)
+        self.value = re.compile(value)
+        self.window = window
+        self.convert = convert
+        self.lower = lower
+        self.upper = upper
+
+    def search(self, text):
+        """Return the first in-range value near any anchor, or None"""
+        for anchor in self.anchor.finditer(text):
+            end = anchor.end() + self.window
+            match = self.value.search(text, anchor.end(), end)
+            if match and match.end() == end:
+                # endpos acts as end-of-string, so a match touching it may be
+                # a number cut in two: re-match it against the full text
+                match = self.value.match(text, match.start())
+            if not match:
+                continue
+            try:
+                value = self.convert(match.group(1))
+                number = float(value)
+            except ValueError:
+                continue
+            if self.lower is not None and number < self.lower:
+                continue
+            if self.upper is not None and number > self.upper:
+                continue
+            return value
+        return None
+
+
+# Rules for each HTML source and field, tried in order until one matches.
+# Built once at import so every call reuses the compiled patterns.
+SOURCE_RULES = {
+    'finlive.in': {
+        'pe_ratio': (
+            ExtractionRule(r'NIFTY 50 PE is', r'(\d+(?:\.\d+)?)', window=12, flags=0),
+            ExtractionRule(r'\bP/?E\b', r'(\d+\.\d+)', window=60),
+            ExtractionRule(r'ratio', r'(\d+\.\d+)', window=60),
+        ),
+    },
+    'trendlyne.com': {
+        # NIFTY 50 has traded between 20,000 and 30,000; its PE between 15 and 35
+        'price': (
+            ExtractionRule(r'NIFTY\s*50|\bLTP\b|\bPrice\b', r'(\d{1,2},?\d{3}\.\d+)', window=120,
+                           convert=_plain_number, lower=20000, upper=30000),
+        ),
+        'pe_ratio': (
+            ExtractionRule(r'\bP/?E\b', r'(\d+\.\d+)', window=60, lower=15, upper=35),
+        ),
+    },
+    'screener.in': {
+        'price': (
+            ExtractionRule(r'Current Price|\bPrice\b', r'(\d[\d,]*(?:\.\d+)?)', window=40,
+                           convert=_plain_number),
+        ),
+        'pe_ratio': (
+            ExtractionRule(r'\bP/?E\b', r'(\d+(?:\.\d+)?)', window=30),
+        ),
+    },
+    'tickertape.in': {
+        'value': (
+            ExtractionRule(r'Market Mood Index|\bMMI\b', r'\b(\d{1,3})(?:\.\d+)?\b', window=80,
+                           convert=int, lower=0, upper=100),
+        ),
+    },
+    'goodreturns.in': {
+        'value': (
+            ExtractionRule(r'\bMMI\b', r'\b(\d{1,3})\b', window=60, convert=int, lower=0, upper=100),
+            ExtractionRule(r'Market Mood Index', r'\b(\d{1,3})\b', window=60, convert=int, lower=0, upper=100),
+            ExtractionRule(r'\bcurrent\b', r'\b(\d{1,3})\b', window=40, convert=int, lower=0, upper=100),
+        ),
+    },
+}
+
+
+def extract(rules, text):
+    """Apply rules in order and return the first value found, or None"""
+    for rule in rules:
+        value = rule.search(text)
+        if value is not None:
+            return value
+    return None
+
+
+def extract_fields(source, text):
+    """Extract every field declared for a source; missing fields map to 'N/A'"""
+    results = {}
+    for field, rules in SOURCE_RULES[source].items():
+        value = extract(rules, text)
+        results[field] = 'N/A' if value is None else value
+    return results
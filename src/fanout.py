@@ -0,0 +1,197 @@
+import time
+import random
+import logging
+from collections import namedtuple
+from concurrent.futures import ThreadPoolExecutor, FIRST_COMPLETED, wait
+
+logger = logging.getLogger(__name__)
+
+# Values the source methods use to say "nothing usable here"
+INVALID_VALUES = ('N/A', 'Error')
+
+# A scraping source: display name, host it talks to, fields it can supply
+# and the name of the scraper method that fetches it
+DataSource = namedtuple('DataSource', ['name', 'host', 'fields', 'method'])
+
+
+def is_valid(value):
+    """Check whether a scraped value is usable"""
+    return value is not None and value not in INVALID_VALUES
+
+
+def merge_in_priority(sources, results, fields, pending=()):
+    """Fill each field from the highest-priority source that supplied it.
+
+    `results` maps source name to the dict the source returned. A field is
+    only filled once every higher-priority source that could supply it has
+    answered, so names in `pending` block lower-priority values. Returns a
+    dict of field -> (value, source name).
+    """
+    filled = {}
+    blocked = set()
+
+    for source in sources:
+        if source.name in pending:
+            blocked.update(field for field in source.fields if field not in filled)
+            continue
+
+        data = results.get(source.name) or {}
+        for field in source.fields:
+            if field in filled or field in blocked:
+                continue
+            if is_valid(data.get(field)):
+                filled[field] = (data[field], source.name)
+
+    return {field: filled[field] for field in fields if field in filled}
+
+
+def collect_concurrently(sources, fetch, fields, deadline, max_workers=None):
+    """Run all sources in parallel and merge their results in priority order.
+
+    `fetch(source)` returns the source's data dict and `deadline` is an
+    absolute `time.monotonic()` value. Waiting stops as soon as every field
+    is settled or the deadline passes; sources still running at that point
+    are abandoned. Returns (filled, results) as in `merge_in_priority`.
+    """
+    results = {}
+    executor = ThreadPoolExecutor(max_workers=max_workers or len(sources))
+    futures = {executor.submit(fetch, source): source for source in sources}
+    pending = set(futures)
+
+    try:
+        while pending:
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                logger.warning(f"Deadline reached with {len(pending)} source(s) still running")
+                break
+
+            done, pending = wait(pending, timeout=remaining, return_when=FIRST_COMPLETED)
+            for future in done:
+                source = futures[future]
+                try:
+                    results[source.name] = future.result()
+                except Exception as e:
+                    logger.error(f"Error with source {source.name}: {e}")
+                    results[source.name] = {}
+
+            waiting_on = {futures[future].name for future in pending}
+            if len(merge_in_priority(sources, results, fields, waiting_on)) == len(fields):
+                break
+    finally:
+        executor.shutdown(wait=False, cancel_futures=True)
+
+    return merge_in_priority(sources, results, fields), results
+
+
+def collect_hedged(sources, fetch, fields, deadline, hedge_after):
+    """Query sources one at a time, hedging with the next only when one is slow.
+
+    The first source that can supply a missing field starts at once. The
+    next one starts when the latest has been running for `hedge_after(source)`
+    seconds (e.g. its p90 latency) without an answer, or as soon as no
+    running source can supply a field that is still missing. The first valid value for each field
+    wins; once every field is filled, sources still running are abandoned and
+    the rest never start. Returns (filled, results) as in `merge_in_priority`.
+    """
+    results = {}
+    filled = {}
+    queue = list(sources)
+    executor = ThreadPoolExecutor(max_workers=len(sources) or 1)
+    running = {}
+
+    def start_next():
+        """Start the next source that can fill a missing field; returns when to hedge it"""
+        while queue:
+            source = queue.pop(0)
+            if any(field in source.fields for field in fields if field not in filled):
+                running[executor.submit(fetch, source)] = source
+                return time.monotonic() + hedge_after(source)
+        return None
+
+    try:
+        hedge_at = start_next()
+        while running:
+            now = time.monotonic()
+            if now >= deadline:
+                logger.warning(f"Deadline reached with {len(running)} source(s) still running")
+                break
+
+            timeout = (deadline if hedge_at is None else min(deadline, hedge_at)) - now
+            done, _ = wait(running, timeout=timeout, return_when=FIRST_COMPLETED)
+            for future in done:
+                source = running.pop(future)
+                try:
+                    results[source.name] = future.result()
+                except Exception as e:
+                    logger.error(f"Error with source {source.name}: {e}")
+                    results[source.name] = {}
+                for field in fields:
+                    value = results[source.name].get(field)
+                    if field in source.fields and field not in filled and is_valid(value):
+                        filled[field] = (value, source.name)
+
+            if len(filled) == len(fields):
+                break
+            missing = [field for field in fields if field not in filled]
+            if not any(field in source.fields for source in running.values() for field in missing):
+                # Nothing in flight can fill what's left: move on without waiting
+                hedge_at = start_next()
+            elif hedge_at is not None and time.monotonic() >= hedge_at:
+                slow = ', '.join(source.name for source in running.values())
+                hedge_at = start_next()
+                if hedge_at is not None:
+                    logger.info(f"Hedging: {slow} slower than usual")
+    finally:
+        executor.shutdown(wait=False, cancel_futures=True)
+
+    return {field: filled[field] for field in fields if field in filled}, results
+
+
+def backoff_delay(attempt, base=1.0, cap=8.0):
+    """Full-jitter exponential backoff: uniform over [0, min(cap, base * 2**attempt))"""
+    return random.uniform(0, min(cap, base * 2 ** attempt))
+
+
+def retry_missing(sources, fetch, fields, filled, deadline, attempts=3, host_budget=2,
+                  base_delay=1.0, max_delay=8.0, max_workers=None, sleep=time.sleep):
+    """Re-query only the sources that can supply fields still missing from `filled`.
+
+    `filled` is a dict of field -> (value, source name), as returned by
+    `collect_concurrently`, and is updated in place. Each round waits a
+    jittered, exponentially growing delay, then runs the candidate sources in
+    parallel. Every host may be retried at most `host_budget` times, and no
+    round starts if its delay would run past `deadline`.
+    `fetch(source, attempt)` returns the source's data dict.
+    """
+    budget = {}
+
+    for attempt in range(1, attempts + 1):
+        missing = [field for field in fields if field not in filled]
+        if not missing:
+            break
+
+        candidates = [
+            source for source in sources
+            if any(field in missing for field in source.fields) and budget.get(source.host, host_budget) > 0
+        ]
+        if not candidates:
+            logger.warning(f"Retry budget spent with {', '.join(missing)} still missing")
+            break
+
+        delay = backoff_delay(attempt - 1, base_delay, max_delay)
+        if time.monotonic() + delay >= deadline:
+            logger.warning(f"No time left to retry {', '.join(missing)}")
+            break
+
+        logger.info(f"Retry {attempt} for {', '.join(missing)} in {delay:.1f}s from "
+                    f"{', '.join(source.name for source in candidates)}")
+        sleep(delay)
+        for source in candidates:
+            budget[source.host] = budget.get(source.host, host_budget) - 1
+
+        found, _ = collect_concurrently(
+            candidates, lambda source: fetch(source, attempt), missing, deadline, max_workers
+        )
+        filled.update(found)
+
+    return filled
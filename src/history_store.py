@@ -0,0 +1,75 @@
+import time
+import sqlite3
+import logging
+import threading
+
+from snapshot import SNAPSHOT_FIELDS, to_number
+
+logger = logging.getLogger(__name__)
+
+_SCHEMA = f"""
+CREATE TABLE IF NOT EXISTS snapshots (
+    ts REAL NOT NULL,
+    {', '.join(f'{field} REAL' for field in SNAPSHOT_FIELDS)},
+    source TEXT
+);
+CREATE INDEX IF NOT EXISTS snapshots_ts ON snapshots (ts);
+"""
+
+
+def _columns(fields):
+    """('ts', *fields), refusing anything that isn't a snapshot column"""
+    unknown = set(fields) - set(SNAPSHOT_FIELDS)
+    if unknown:
+        raise ValueError(f"Unknown snapshot fields: {', '.join(sorted(unknown))}")
+    return ('ts',) + tuple(fields)
+
+
+class HistoryStore:
+    """Append-only SQLite time series of every scraped market snapshot"""
+
+    def __init__(self, path):
+        self.path = path
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        self._conn.executescript(_SCHEMA)
+
+    def append(self, values, source=None, timestamp=None):
+        """Store one snapshot; `values` maps SNAPSHOT_FIELDS names to raw values"""
+        row = [time.time() if timestamp is None else timestamp]
+        row += [to_number(values.get(field)) for field in SNAPSHOT_FIELDS]
+        row.append(source)
+        with self._lock, self._conn:
+            self._conn.execute(
+                f"INSERT INTO snapshots VALUES ({', '.join('?' * len(row))})", row
+            )
+
+    def range(self, start=None, end=None, fields=SNAPSHOT_FIELDS):
+        """Snapshots with start <= ts < end, oldest first, as dicts"""
+        columns = _columns(fields)
+        query = f"SELECT {', '.join(columns)} FROM snapshots WHERE ts >= ? AND ts < ? ORDER BY ts"
+        bounds = (float('-inf') if start is None else start, float('inf') if end is None else end)
+        with self._lock:
+            rows = self._conn.execute(query, bounds).fetchall()
+        return [dict(zip(columns, row)) for row in rows]
+
+    def latest(self, n=1, fields=SNAPSHOT_FIELDS):
+        """The n most recent snapshots, oldest first"""
+        columns = _columns(fields)
+        query = f"SELECT {', '.join(columns)} FROM snapshots ORDER BY ts DESC LIMIT ?"
+        with self._lock:
+            rows = self._conn.execute(query, (n,)).fetchall()
+        return [dict(zip(columns, row)) for row in reversed(rows)]
+
+    def column(self, field, start=None, end=None):
+        """(timestamps, values) lists for one field, skipping missing values"""
+        _columns((field,))
+        query = f"SELECT ts, {field} FROM snapshots WHERE ts >= ? AND ts < ? AND {field} IS NOT NULL ORDER BY ts"
+        bounds = (float('-inf') if start is None else start, float('inf') if end is None else end)
+        with self._lock:
+            rows = self._conn.execute(query, bounds).fetchall()
+        return [row[0] for row in rows], [row[1] for row in rows]
+
+    def close(self):
+        with self._lock:
+            self._conn.close()
@@ -0,0 +1,188 @@
+import os
+import json
+import time
+import hashlib
+import threading
+import contextvars
+from contextlib import contextmanager
+from urllib.parse import urlsplit
+
+import requests
+from requests.hooks import dispatch_hook
+from requests.structures import CaseInsensitiveDict
+
+from state_dir import atomic_write
+
+# Headers that describe the wire format, not the decoded body we store
+_DROPPED_HEADERS = ('content-encoding', 'content-length', 'transfer-encoding')
+
+
+class HTTPCache:
+    """On-disk store of GET responses, bounded in size with LRU eviction"""
+
+    def __init__(self, directory, max_bytes=50 * 1024 * 1024):
+        self.directory = directory
+        self.max_bytes = max_bytes
+        self._index_path = os.path.join(directory, 'index.json')
+        self._lock = threading.Lock()
+        os.makedirs(directory, exist_ok=True)
+        self._index = self._load_index()
+
+    def _load_index(self):
+        try:
+            with open(self._index_path) as f:
+                return json.load(f)
+        except (OSError, ValueError):
+            return {}
+
+    def _save_index(self):
+        atomic_write(self._index_path, json.dumps(self._index))
+
+    def _body_path(self, key):
+        return os.path.join(self.directory, hashlib.sha1(key.encode()).hexdigest() + '.body')
+
+    def lookup(self, key):
+        """Get (entry, body) for a cached URL, or None"""
+        with self._lock:
+            entry = self._index.get(key)
+            if entry is None:
+                return None
+            try:
+                with open(self._body_path(key), 'rb') as f:
+                    body = f.read()
+            except OSError:
+                del self._index[key]
+                return None
+            entry['last_access'] = time.time()
+            self._save_index()
+            return dict(entry), body
+
+    def store(self, key, response):
+        """Save a 200 response body together with its validators"""
+        body = response.content
+        headers = {
+            name: value for name, value in response.headers.items()
+            if name.lower() not in _DROPPED_HEADERS
+        }
+        now = time.time()
+        with self._lock:
+            with open(self._body_path(key), 'wb') as f:
+                f.write(body)
+            self._index[key] = {
+                'url': response.url,
+                'status': response.status_code,
+                'headers': headers,
+                'encoding': response.encoding,
+                'etag': response.headers.get('ETag'),
+                'last_modified': response.headers.get('Last-Modified'),
+                'stored_at': now,
+                'last_access': now,
+                'size': len(body)
+            }
+            self._evict()
+            self._save_index()
+
+    def revalidated(self, key, response):
+        """Mark an entry fresh again after a 304 Not Modified"""
+        with self._lock:
+            entry = self._index.get(key)
+            if entry is None:
+                return
+            entry['stored_at'] = entry['last_access'] = time.time()
+            entry['etag'] = response.headers.get('ETag', entry['etag'])
+            entry['last_modified'] = response.headers.get('Last-Modified', entry['last_modified'])
+            self._save_index()
+
+    def _evict(self):
+        """Drop least recently used entries until the cache fits in max_bytes"""
+        total = sum(entry['size'] for entry in self._index.values())
+        for key in sorted(self._index, key=lambda k: self._index[k]['last_access']):
+            if total <= self.max_bytes:
+                break
+            total -= self._index.pop(key)['size']
+            try:
+                os.remove(self._body_path(key))
+            except OSError:
+                pass
+
+
+class CachedSession(requests.Session):
+    """requests.Session that serves GETs from an HTTPCache.
+
+    Fresh entries (younger than their host's TTL) are returned without any
+    network traffic; stale ones are revalidated with If-None-Match /
+    If-Modified-Since so an unchanged page costs only a 304. With a
+    `politeness` scheduler (politeness.HostScheduler) every request that
+    does go over the wire first waits for its host's slot; cache hits never
+    wait. Inside `bypass_cache()` GETs skip the lookup and always go over the
+    wire (a 200 still refreshes the entry).
+    """
+
+    def __init__(self, cache, ttls=None, default_ttl=300, politeness=None):
+        super().__init__()
+        self.cache = cache
+        self.ttls = ttls or {}
+        self.default_ttl = default_ttl
+        self.politeness = politeness
+        self._bypass = contextvars.ContextVar(f'bypass_cache_{id(self)}', default=False)
+
+    @contextmanager
+    def bypass_cache(self):
+        """Fetch from the network for the rest of this block (in this thread/context only)"""
+        token = self._bypass.set(True)
+        try:
+            yield
+        finally:
+            self._bypass.reset(token)
+
+    def ttl_for(self, url):
+        """Seconds a cached response from this URL's host stays fresh"""
+        return self.ttls.get(urlsplit(url).hostname, self.default_ttl)
+
+    def _network_request(self, method, url, **kwargs):
+        if self.politeness is not None:
+            self.politeness.wait(url)
+        return super().request(method, url, **kwargs)
+
+    def request(self, method, url, **kwargs):
+        if method.upper() != 'GET' or kwargs.get('stream'):
+            return self._network_request(method, url, **kwargs)
+
+        key = requests.Request('GET', url, params=kwargs.get('params')).prepare().url
+        cached = None if self._bypass.get() else self.cache.lookup(key)
+
+        if cached is not None:
+            entry, body = cached
+            if time.time() - entry['stored_at'] < self.ttl_for(key):
+                # Nothing goes over the wire, but response hooks still see the hit
+                return dispatch_hook('response', self.hooks, self._build_response(entry, body))
+
+            headers = dict(kwargs.pop('headers', None) or {})
+            if entry['etag']:
+                headers['If-None-Match'] = entry['etag']
+            if entry['last_modified']:
+                headers['If-Modified-Since'] = entry['last_modified']
+            kwargs['headers'] = headers
+
+        response = self._network_request(method, url, **kwargs)
+
+        if response.status_code == 304 and cached is not None:
+            self.cache.revalidated(key, response)
+            return self._build_response(*cached)
+
+        if response.status_code == 200 and 'no-store' not in response.headers.get('Cache-Control', ''):
+            self.cache.store(key, response)
+
+        return response
+
+    def _build_response(self, entry, body):
+        """Turn a cache entry back into a requests.Response"""
+        response = requests.Response()
+        response.status_code = entry['status']
+        response.reason = 'OK'
+        response.url = entry['url']
+        response.headers = CaseInsensitiveDict(entry['headers'])
+        response.encoding = entry['encoding']
+        response._content = body
+        response.from_cache = True
+        return response
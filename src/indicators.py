@@ -0,0 +1,296 @@
+import json
+import math
+from array import array
+from bisect import bisect_left, bisect_right, insort
+from datetime import datetime
+
+from snapshot import to_number
+from state_dir import IST, atomic_write
+
+
+class RingBuffer:
+    """Fixed-size window of floats in an array('d'); the oldest value is overwritten first"""
+
+    def __init__(self, size):
+        self.size = size
+        self.values = array('d', [0.0]) * size
+        self.count = 0
+        self.head = 0  # next slot to write
+
+    def push(self, value):
+        """Append `value`; returns the value it evicted, or None while the window fills"""
+        evicted = self.values[self.head] if self.count == self.size else None
+        self.values[self.head] = value
+        self.head = (self.head + 1) % self.size
+        self.count = min(self.count + 1, self.size)
+        return evicted
+
+    def replace_last(self, value):
+        """Overwrite the newest value; returns the old one"""
+        index = (self.head - 1) % self.size
+        old, self.values[index] = self.values[index], value
+        return old
+
+    def ago(self, n):
+        """The value pushed n steps before the newest (0 is the newest)"""
+        return self.values[(self.head - 1 - n) % self.size]
+
+    def window(self):
+        """Values currently in the window, in no particular order"""
+        return self.values if self.count == self.size else self.values[:self.count]
+
+    def to_dict(self):
+        return {'size': self.size, 'values': self.values.tolist(), 'count': self.count, 'head': self.head}
+
+    @classmethod
+    def from_dict(cls, state):
+        buffer = cls(state['size'])
+        buffer.values = array('d', state['values'])
+        buffer.count = state['count']
+        buffer.head = state['head']
+        return buffer
+
+
+class Indicator:
+    """Base for streaming indicators: update() is O(1) and value() reads the current state.
+
+    update(value, replace=True) revises the newest observation instead of
+    adding one, so intraday ticks keep re-pricing the current bar.
+    """
+
+    def update(self, value, replace=False):
+        raise NotImplementedError
+
+    def value(self):
+        raise NotImplementedError
+
+    def to_dict(self):
+        state = {}
+        for key, value in vars(self).items():
+            if isinstance(value, RingBuffer):
+                value = value.to_dict()
+            elif isinstance(value, array):
+                value = value.tolist()
+            state[key] = value
+        return state
+
+    def restore(self, state):
+        for key, current in vars(self).items():
+            if key not in state:
+                continue
+            value = state[key]
+            if isinstance(current, RingBuffer):
+                value = RingBuffer.from_dict(value)
+            elif isinstance(current, array):
+                value = array(current.typecode, value)
+            setattr(self, key, value)
+
+
+class SMA(Indicator):
+    """Simple moving average over the last `window` observations"""
+
+    def __init__(self, window):
+        self.buffer = RingBuffer(window)
+        self.total = 0.0
+
+    def update(self, value, replace=False):
+        if replace and self.buffer.count:
+            self.total += value - self.buffer.replace_last(value)
+            return
+        evicted = self.buffer.push(value)
+        self.total += value - (evicted or 0.0)
+        if self.buffer.head == 0:
+            # Once per lap, re-sum to shed floating-point drift
+            self.total = math.fsum(self.buffer.window())
+
+    def value(self):
+        return self.total / self.buffer.size if self.buffer.count == self.buffer.size else None
+
+
+class RSI(Indicator):
+    """Wilder's relative strength index"""
+
+    def __init__(self, period=14):
+        self.period = period
+        self.previous = None
+        self.avg_gain = 0.0
+        self.avg_loss = 0.0
+        self.count = 0
+        self.undo = None  # state before the newest observation, for replace
+
+    def update(self, value, replace=False):
+        if replace and self.undo is not None:
+            self.previous, self.avg_gain, self.avg_loss, self.count = self.undo
+        self.undo = (self.previous, self.avg_gain, self.avg_loss, self.count)
+        if self.previous is not None:
+            change = value - self.previous
+            gain, loss = max(change, 0.0), max(-change, 0.0)
+            self.count += 1
+            if self.count <= self.period:
+                # Seed with the plain average of the first `period` moves
+                self.avg_gain += gain / self.period
+                self.avg_loss += loss / self.period
+            else:
+                self.avg_gain = (self.avg_gain * (self.period - 1) + gain) / self.period
+                self.avg_loss = (self.avg_loss * (self.period - 1) + loss) / self.period
+        self.previous = value
+
+    def value(self):
+        if self.count < self.period:
+            return None
+        if self.avg_loss == 0:
+            return 50.0 if self.avg_gain == 0 else 100.0
+        return 100.0 - 100.0 / (1.0 + self.avg_gain / self.avg_loss)
+
+
+class RollingPercentile(Indicator):
+    """Percentile rank (0-100) of the newest observation within the window.
+
+    A sorted copy of the window is kept alongside the ring buffer, so each
+    update is a binary search plus a short memmove rather than a re-sort.
+    """
+
+    def __init__(self, window, min_periods=20):
+        self.buffer = RingBuffer(window)
+        self.sorted = array('d')
+        self.min_periods = min_periods
+
+    def _remove(self, value):
+        del self.sorted[bisect_left(self.sorted, value)]
+
+    def update(self, value, replace=False):
+        if replace and self.buffer.count:
+            self._remove(self.buffer.replace_last(value))
+        else:
+            evicted = self.buffer.push(value)
+            if evicted is not None:
+                self._remove(evicted)
+        insort(self.sorted, value)
+
+    def value(self):
+        if self.buffer.count < self.min_periods:
+            return None
+        newest = self.buffer.ago(0)
+        # Ties count half, so a flat window ranks at 50
+        below = bisect_left(self.sorted, newest)
+        ties = bisect_right(self.sorted, newest) - below
+        return 100.0 * (below + ties / 2.0) / self.buffer.count
+
+
+class RateOfChange(Indicator):
+    """Percent change over the last `period` observations"""
+
+    def __init__(self, period):
+        self.buffer = RingBuffer(period + 1)
+
+    def update(self, value, replace=False):
+        if replace and self.buffer.count:
+            self.buffer.replace_last(value)
+        else:
+            self.buffer.push(value)
+
+    def value(self):
+        if self.buffer.count < self.buffer.size:
+            return None
+        base = self.buffer.ago(self.buffer.size - 1)
+        return None if base == 0 else (self.buffer.ago(0) - base) / base * 100.0
+
+
+class ZScore(Indicator):
+    """How many standard deviations the newest observation is from the window mean"""
+
+    def __init__(self, window, min_periods=20):
+        self.buffer = RingBuffer(window)
+        self.total = 0.0
+        self.total_sq = 0.0
+        self.min_periods = min_periods
+
+    def update(self, value, replace=False):
+        if replace and self.buffer.count:
+            old = self.buffer.replace_last(value)
+        else:
+            old = self.buffer.push(value) or 0.0
+        self.total += value - old
+        self.total_sq += value * value - old * old
+        if self.buffer.head == 0:
+            window = self.buffer.window()
+            self.total = math.fsum(window)
+            self.total_sq = math.fsum(v * v for v in window)
+
+    def value(self):
+        n = self.buffer.count
+        if n < self.min_periods:
+            return None
+        mean = self.total / n
+        std = math.sqrt(max(self.total_sq / n - mean * mean, 0.0))
+        return 0.0 if std == 0 else (self.buffer.ago(0) - mean) / std
+
+
+# name -> (snapshot field it reads, factory); windows are in daily bars
+INDICATORS = {
+    'sma_fast': ('nifty_price', lambda: SMA(20)),
+    'sma_slow': ('nifty_price', lambda: SMA(50)),
+    'rsi': ('nifty_price', lambda: RSI(14)),
+    'vix_percentile': ('vix', lambda: RollingPercentile(250)),
+    'mmi_roc': ('mmi', lambda: RateOfChange(5)),
+    'pe_zscore': ('pe_ratio', lambda: ZScore(250)),
+}
+
+
+class MarketIndicators:
+    """The analyzer's streaming indicators, fed one snapshot at a time.
+
+    Observations are grouped into bars (one per IST day by default): a
+    snapshot for a bar an indicator has already seen revises that bar rather
+    than adding a new one, so intraday polls cost O(1) and don't skew the
+    daily windows.
+    """
+
+    def __init__(self, path=None):
+        self.path = path
+        self.indicators = {name: factory() for name, (_, factory) in INDICATORS.items()}
+        self.bars = {}
+
+    @classmethod
+    def load(cls, path, history=None):
+        """Restore saved state, or replay `history` (a HistoryStore) if there is none"""
+        indicators = cls(path)
+        try:
+            with open(path) as f:
+                state = json.load(f)
+            for name, indicator in indicators.indicators.items():
+                if name in state['indicators']:
+                    indicator.restore(state['indicators'][name])
+            indicators.bars = state['bars']
+        except (OSError, ValueError, KeyError):
+            if history is not None:
+                for row in history.range(fields=tuple({field for field, _ in INDICATORS.values()})):
+                    indicators.update(row, timestamp=row['ts'])
+        return indicators
+
+    def update(self, values, bar=None, timestamp=None):
+        """Feed one snapshot (SNAPSHOT_FIELDS names to raw values); missing values are skipped"""
+        if bar is None:
+            when = datetime.now(IST) if timestamp is None else datetime.fromtimestamp(timestamp, IST)
+            bar = when.date().isoformat()
+        for name, (field, _) in INDICATORS.items():
+            number = to_number(values.get(field))
+            if number is None:
+                continue
+            self.indicators[name].update(number, replace=self.bars.get(name) == bar)
+            self.bars[name] = bar
+
+    def values(self):
+        """Current value of every indicator (None while warming up), plus sma_gap in %"""
+        current = {name: indicator.value() for name, indicator in self.indicators.items()}
+        fast, slow = current['sma_fast'], current['sma_slow']
+        current['sma_gap'] = None if fast is None or not slow else (fast / slow - 1) * 100.0
+        return current
+
+    def save(self, path=None):
+        path = path or self.path
+        state = {
+            'indicators': {name: indicator.to_dict() for name, indicator in self.indicators.items()},
+            'bars': self.bars
+        }
+        atomic_write(path, json.dumps(state))
@@ -0,0 +1,94 @@
+from bisect import bisect_left
+from collections import namedtuple
+
+import numpy as np
+
+# One NSE session of one-minute bars (09:15-15:30)
+SESSION_BARS = 375
+
+OHLCV = ('open', 'high', 'low', 'close', 'volume')
+
+Bars = namedtuple('Bars', ('timestamp',) + OHLCV)
+
+
+class IntradayBars:
+    """Fixed-capacity ring buffer of OHLCV bars in preallocated NumPy arrays.
+
+    Every bar is written twice, at slot i and at slot i + capacity, in arrays
+    of length 2 * capacity. The newest n bars are then always one contiguous
+    slice, so view() hands out read-only views instead of copies, however
+    often the ring has wrapped.
+    """
+
+    def __init__(self, capacity=5 * SESSION_BARS):
+        self.capacity = capacity
+        self.timestamps = np.zeros(2 * capacity, dtype=np.int64)
+        self.values = np.full((len(OHLCV), 2 * capacity), np.nan)
+        self.head = 0  # next slot to write, in [0, capacity)
+        self.count = 0
+
+    def __len__(self):
+        return self.count
+
+    @property
+    def last_timestamp(self):
+        """Epoch seconds of the newest bar, or None when empty"""
+        return int(self.timestamps[self.head - 1 + self.capacity]) if self.count else None
+
+    def _write(self, slots, timestamps, columns):
+        for offset in (0, self.capacity):
+            self.timestamps[slots + offset] = timestamps
+            self.values[:, slots + offset] = columns
+
+    def extend(self, timestamps, columns):
+        """Append bars newer than the last one stored; returns how many were added.
+
+        `columns` is a (5, n) float array in OHLCV order. A bar with the same
+        timestamp as the newest stored one replaces it, since the last bar of
+        a chart is still forming when it is fetched.
+        """
+        timestamps = np.asarray(timestamps, dtype=np.int64)
+        columns = np.asarray(columns, dtype=np.float64)
+        last = self.last_timestamp
+        if last is not None:
+            keep = timestamps >= last
+            timestamps, columns = timestamps[keep], columns[:, keep]
+            if len(timestamps) and timestamps[0] == last:
+                self._write(np.array([self.head - 1]) % self.capacity, timestamps[:1], columns[:, :1])
+                timestamps, columns = timestamps[1:], columns[:, 1:]
+
+        # Only the newest `capacity` bars can survive anyway
+        timestamps, columns = timestamps[-self.capacity:], columns[:, -self.capacity:]
+        added = len(timestamps)
+        if added:
+            slots = (self.head + np.arange(added)) % self.capacity
+            self._write(slots, timestamps, columns)
+            self.head = (self.head + added) % self.capacity
+            self.count = min(self.count + added, self.capacity)
+        return added
+
+    def ingest_chart(self, result):
+        """Append new bars from one Yahoo v8 chart result (`chart.result[0]`)"""
+        timestamps = result.get('timestamp') or []
+        quote = ((result.get('indicators') or {}).get('quote') or [{}])[0]
+        # Decode only the tail the buffer hasn't seen; Yahoo nulls become NaN
+        start = bisect_left(timestamps, self.last_timestamp) if self.count else 0
+        columns = np.array(
+            [(quote.get(field) or [None] * len(timestamps))[start:] for field in OHLCV],
+            dtype=np.float64
+        )
+        return self.extend(timestamps[start:], columns.reshape(len(OHLCV), -1))
+
+    def view(self, n=None):
+        """Read-only views of the newest n bars (all of them by default), oldest first"""
+        n = self.count if n is None else min(n, self.count)
+        end = self.head + self.capacity
+        timestamps = self.timestamps[end - n:end]
+        values = self.values[:, end - n:end]
+        timestamps.flags.writeable = False
+        values.flags.writeable = False
+        return Bars(timestamps, *values)
+
+    def clear(self):
+        self.head = 0
+        self.count = 0
@@ -1,7 +1,14 @@
+import startup_profile  # first, so --startup-profile can time every import below
+import os
 import logging
 from scraper import MarketDataScraper
 from analyzer import MarketAnalyzer
 from telegram_bot import TelegramNotifier
+from metrics import MetricsRecorder
+from history_store import HistoryStore
+from indicators import MarketIndicators
+from snapshot import MarketSnapshot
+from state_dir import state_path
 
 logging.basicConfig(
     level=logging.INFO,
@@ -9,28 +16,72 @@ logging.basicConfig(
 )
 logger = logging.getLogger(__name__)
 
+def save_snapshot(snapshot):
+    """Append this run's values to the local history store"""
+    try:
+        history = HistoryStore(os.environ.get('HISTORY_DB_PATH') or state_path('history.sqlite3'))
+        history.append(snapshot.values(), source='nse/tickertape', timestamp=snapshot.timestamp)
+        history.close()
+    except Exception as e:
+        logger.error(f"Error saving snapshot to history: {e}")
+
+def update_indicators(values):
+    """Feed this run's values into the persisted streaming indicators and return their values"""
+    try:
+        history = HistoryStore(os.environ.get('HISTORY_DB_PATH') or state_path('history.sqlite3'))
+        indicators = MarketIndicators.load(state_path('indicators.json'), history=history)
+        history.close()
+        indicators.update(values)
+        indicators.save()
+        return indicators.values()
+    except Exception as e:
+        logger.error(f"Error updating indicators: {e}")
+        return None
+
 def main():
+    startup_profile.mark('ready')
+    metrics = MetricsRecorder()
     try:
         # Initialize components
         scraper = MarketDataScraper()
+        metrics.instrument(scraper.session)
         analyzer = MarketAnalyzer()
         notifier = TelegramNotifier()
         
         # Scrape data
         logger.info("Scraping market data...")
-        nifty_data = scraper.get_nifty_data()
-        vix_data = scraper.get_nifty_vix()
-        mmi_data = scraper.get_mmi_data()
+        with metrics.measure('source', 'nse_nifty') as event:
+            nifty_data = scraper.get_nifty_data()
+            event['success'] = nifty_data is not None
+        with metrics.measure('source', 'nse_vix') as event:
+            vix_data = scraper.get_nifty_vix()
+            event['success'] = vix_data is not None
+        with metrics.measure('source', 'tickertape_mmi') as event:
+            mmi_data = scraper.get_mmi_data()
+            event['success'] = mmi_data is not None
+        
+        # Parse everything once; the analyzer and formatter take the snapshot
+        snapshot = MarketSnapshot.from_nse(nifty_data, vix_data, mmi_data)
+        save_snapshot(snapshot)
+        indicators = update_indicators(snapshot.values())
         
         # Analyze data
         logger.info("Analyzing market conditions...")
-        analysis = analyzer.analyze_market_condition(nifty_data, vix_data, mmi_data)
+        with metrics.measure('analysis', 'market_condition') as event:
+            analysis = analyzer.analyze_snapshot(snapshot, indicators)
+            event['success'] = analysis['market_condition'] != 'Unable to analyze'
         
         # Format and send message
         logger.info("Formatting and sending message...")
-        message = notifier.format_message(nifty_data, vix_data, mmi_data, analysis)
+        message = notifier.format_snapshot(snapshot, analysis)
         
-        success = notifier.send_message(message)
+        with metrics.measure('telegram', 'sendMessage') as event:
+            if os.environ.get('TELEGRAM_DELTA_MODE') == '1':
+                # Only send when something moved, editing today's message in place
+                success = notifier.send_update(message, snapshot.values())
+            else:
+                success = notifier.send_message(message)
+            event['success'] = success
         
         if success:
             logger.info("Market update sent successfully!")
@@ -47,6 +98,9 @@ def main():
             notifier.send_message(error_message)
         except:
             pass
+    
+    finally:
+        metrics.export()
 
 if __name__ == "__main__":
     main()
@@ -1,16 +1,110 @@
-import requests
-from bs4 import BeautifulSoup
-import json
+import startup_profile  # first, so --startup-profile can time every import below
+from bs4 import BeautifulSoup, SoupStrainer
+import lxml.html
 import os
 from datetime import datetime
 import time
-import re
+from concurrent.futures import ThreadPoolExecutor
+from fanout import DataSource, collect_concurrently, collect_hedged, retry_missing, is_valid
+from extraction import extract_fields
+from http_cache import HTTPCache, CachedSession
+from politeness import HostScheduler
+from state_dir import state_path
+from metrics import MetricsRecorder
+from source_health import SourceHealth
+from history_store import HistoryStore
+from telegram_delivery import TelegramDelivery, chat_ids_from_env
+from change_detection import ReportTracker, deliver_update
+from snapshot import MarketSnapshot
+from zones import MMI_ZONES, MMI_STATUS
+from quotes import QuoteFetcher, DEFAULT_WATCHLIST
+
+# Sources in configured priority order: the first valid value for each field
+# wins. SourceHealth reorders them at run time by observed reliability.
+NIFTY_SOURCES = (
+    DataSource('finlive.in', 'www.finlive.in', ('pe_ratio',), 'get_nifty_data_from_finlive'),
+    DataSource('trendlyne.com', 'trendlyne.com', ('price', 'pe_ratio'), 'get_nifty_data_from_trendlyne'),
+    DataSource('screener.in', 'www.screener.in', ('price', 'pe_ratio'), 'get_nifty_data_from_screener'),
+    DataSource('Yahoo Finance API', 'query1.finance.yahoo.com', ('price',), 'get_nifty_data_from_api'),
+)
+
+MMI_SOURCES = (
+    DataSource('tickertape.in', 'www.tickertape.in', ('value',), 'get_mmi_data_from_tickertape'),
+    DataSource('goodreturns.in', 'www.goodreturns.in', ('value',), 'get_mmi_data_from_goodreturns'),
+)
+
+# Retry rounds for fields still missing after the first scrape, and how many
+# of those rounds any one host may take part in
+RETRY_ATTEMPTS = 3
+RETRY_HOST_BUDGET = 2
+
+# In hedged mode, how long to wait on a source with no latency history
+# before starting the next one
+HEDGE_DEFAULT_DELAY = 3.0
+
+# Snapshot fields this report is built from
+REPORT_FIELDS = ('nifty_price', 'pe_ratio', 'mmi')
+
+# Visible page text, without script/style bodies
+PAGE_TEXT_XPATH = '//body//text()[not(ancestor::script or ancestor::style or ancestor::noscript)]'
+
+# How each HTML source's page is parsed. 'xpath' pulls just the text nodes
+# with lxml; any other backend is a BeautifulSoup tree builder restricted to
+# the elements the source reads.
+PARSE_SPECS = {
+    'finlive.in': {'backend': 'xpath', 'select': PAGE_TEXT_XPATH},
+    'trendlyne.com': {'backend': 'lxml', 'elements': SoupStrainer(['span', 'div', 'td'])},
+    'screener.in': {'backend': 'lxml', 'elements': SoupStrainer('tr')},
+    'tickertape.in': {'backend': 'lxml', 'elements': SoupStrainer(['span', 'div', 'p'])},
+    'goodreturns.in': {'backend': 'xpath', 'select': PAGE_TEXT_XPATH},
+}
+
+# How long (seconds) a cached page from each host is served without revalidation
+CACHE_TTLS = {
+    'www.finlive.in': 3600,  # PE only changes once a day
+    'trendlyne.com': 300,
+    'www.screener.in': 300,
+    'query1.finance.yahoo.com': 60,
+    'www.tickertape.in': 300,
+    'www.goodreturns.in': 300,
+}
+
+# Minimum seconds between two requests to the same site; other sites are
+# not held up. Yahoo's API takes the batched spark requests in parallel.
+POLITENESS_INTERVALS = {
+    'www.finlive.in': 2,
+    'trendlyne.com': 2,
+    'www.screener.in': 2,
+    'query1.finance.yahoo.com': 0,
+    'www.tickertape.in': 2,
+    'www.goodreturns.in': 2,
+}
 
 class MarketDataScraper:
-    def __init__(self):
+    def __init__(self, concurrent=True, deadline=30, cache_ttls=None, parse_specs=None, delta=False,
+                 politeness_intervals=None, hedged=False):
+        # In concurrent mode every source runs in parallel under one overall
+        # deadline (seconds) instead of one after another
+        self.concurrent = concurrent
+        self.deadline = deadline
+        # In hedged (concurrent) mode sources start one at a time and the next
+        # one only joins when the current one runs past its p90 latency
+        self.hedged = hedged
+        # In delta mode unchanged reports are not sent and changed ones edit
+        # today's earlier message instead of posting a new one
+        self.delta = delta
+        self.parse_specs = dict(PARSE_SPECS, **(parse_specs or {}))
         self.telegram_bot_token = os.environ.get('TELEGRAM_BOT_TOKEN')
-        self.telegram_chat_id = os.environ.get('TELEGRAM_CHAT_ID')
-        self.session = requests.Session()
+        self.telegram_chat_ids = chat_ids_from_env()
+        cache = HTTPCache(
+            os.environ.get('HTTP_CACHE_DIR') or state_path('http'),
+            max_bytes=int(os.environ.get('HTTP_CACHE_MAX_MB', 50)) * 1024 * 1024
+        )
+        self.session = CachedSession(
+            cache,
+            ttls=dict(CACHE_TTLS, **(cache_ttls or {})),
+            politeness=HostScheduler(dict(POLITENESS_INTERVALS, **(politeness_intervals or {})))
+        )
         self.session.headers.update({
             'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/91.0.4472.124 Safari/537.36',
             'Accept': 'text/html,application/xhtml+xml,application/xml;q=0.9,image/webp,*/*;q=0.8',
@@ -19,6 +113,42 @@ class MarketDataScraper:
             'Connection': 'keep-alive',
             'Upgrade-Insecure-Requests': '1'
         })
+        # Per-source timings, bytes and outcomes, exported after each run
+        self.metrics = MetricsRecorder()
+        self.metrics.instrument(self.session)
+        self._attempt = 0
+        # Success/latency history per source; decides source order and skips dead ones
+        self.health = SourceHealth(state_path('source_health.json'))
+        # Every scraped snapshot is kept for the analyzer and later reports
+        self.history = HistoryStore(os.environ.get('HISTORY_DB_PATH') or state_path('history.sqlite3'))
+        # Rate-limited, pooled send queue shared by every chat we report to
+        self.delivery = TelegramDelivery(self.telegram_bot_token, metrics=self.metrics)
+        self.reports = ReportTracker(state_path('last_report.json'))
+        # Batched watchlist quotes over the same cached, instrumented session
+        self.quotes = QuoteFetcher(self.session)
+        # Minute bars from the Yahoo chart, created (with NumPy) on first use
+        self._intraday = None
+
+    @property
+    def intraday(self):
+        """Ring buffer of the NIFTY 50 one-minute OHLCV bars seen so far"""
+        if self._intraday is None:
+            from intraday import IntradayBars
+            self._intraday = IntradayBars()
+        return self._intraday
+
+    def _page_tree(self, source, response):
+        """Parse only the elements a source declared it needs"""
+        spec = self.parse_specs[source]
+        return BeautifulSoup(response.content, spec['backend'], parse_only=spec.get('elements'))
+
+    def _page_text(self, source, response):
+        """Get a page's text using the source's parser backend"""
+        spec = self.parse_specs[source]
+        if spec['backend'] == 'xpath':
+            return ' '.join(lxml.html.document_fromstring(response.content).xpath(spec['select']))
+        # Separate text nodes so numbers in neighbouring cells don't run together
+        return self._page_tree(source, response).get_text(' ')
 
     def get_nifty_data_from_finlive(self):
         """Get NIFTY 50 price and PE from finlive.in"""
@@ -27,32 +157,10 @@ class MarketDataScraper:
             response = self.session.get(url, timeout=15)
             response.raise_for_status()
             
-            soup = BeautifulSoup(response.content, 'html.parser')
+            page_text = self._page_text('finlive.in', response)
+            data = extract_fields('finlive.in', page_text)
             
-            # Look for specific patterns in the text
-            page_text = soup.get_text()
-            
-            # Extract PE ratio
-            pe_ratio = 'N/A'
-            pe_pattern = r'NIFTY 50 PE is ([\d.]+)'
-            pe_match = re.search(pe_pattern, page_text)
-            if pe_match:
-                pe_ratio = pe_match.group(1)
-            
-            # Try alternative PE patterns
-            if pe_ratio == 'N/A':
-                pe_patterns = [
-                    r'PE.*?(\d+\.\d+)',
-                    r'P/E.*?(\d+\.\d+)',
-                    r'ratio.*?(\d+\.\d+)'
-                ]
-                for pattern in pe_patterns:
-                    match = re.search(pattern, page_text, re.IGNORECASE)
-                    if match:
-                        pe_ratio = match.group(1)
-                        break
-            
-            return {'pe_ratio': pe_ratio, 'source': 'finlive.in'}
+            return {'pe_ratio': data['pe_ratio'], 'source': 'finlive.in'}
             
         except Exception as e:
             print(f"Error getting data from finlive: {e}")
@@ -65,35 +173,10 @@ class MarketDataScraper:
             response = self.session.get(url, timeout=15)
             response.raise_for_status()
             
-            soup = BeautifulSoup(response.content, 'html.parser')
+            page_text = self._page_text('trendlyne.com', response)
+            data = extract_fields('trendlyne.com', page_text)
             
-            # Look for price and PE data
-            price = 'N/A'
-            pe_ratio = 'N/A'
-            
-            # Try to find price elements
-            price_elements = soup.find_all(['span', 'div', 'td'], text=re.compile(r'[\d,]+\.\d+'))
-            numbers = []
-            
-            for element in price_elements:
-                try:
-                    # Extract clean number
-                    text = element.get_text().strip()
-                    clean_num = re.sub(r'[^\d.]', '', text)
-                    if '.' in clean_num and len(clean_num) > 3:
-                        num = float(clean_num)
-                        numbers.append(num)
-                except:
-                    continue
-            
-            # Heuristic: NIFTY price is usually above 20,000, PE is usually between 15-30
-            for num in numbers:
-                if 20000 <= num <= 30000 and price == 'N/A':
-                    price = str(num)
-                elif 15 <= num <= 35 and pe_ratio == 'N/A':
-                    pe_ratio = str(num)
-            
-            return {'price': price, 'pe_ratio': pe_ratio, 'source': 'trendlyne.com'}
+            return {'price': data['price'], 'pe_ratio': data['pe_ratio'], 'source': 'trendlyne.com'}
             
         except Exception as e:
             print(f"Error getting data from trendlyne: {e}")
@@ -106,31 +189,10 @@ class MarketDataScraper:
             response = self.session.get(url, timeout=15)
             response.raise_for_status()
             
-            soup = BeautifulSoup(response.content, 'html.parser')
-            
-            # Look for specific data fields
-            price = 'N/A'
-            pe_ratio = 'N/A'
+            page_text = self._page_text('screener.in', response)
+            data = extract_fields('screener.in', page_text)
             
-            # Try to find data in table rows
-            rows = soup.find_all('tr')
-            for row in rows:
-                cells = row.find_all(['td', 'th'])
-                if len(cells) >= 2:
-                    header = cells[0].get_text().strip().lower()
-                    value = cells[1].get_text().strip()
-                    
-                    if 'price' in header or 'current' in header:
-                        price_match = re.search(r'([\d,]+\.?\d*)', value)
-                        if price_match:
-                            price = price_match.group(1).replace(',', '')
-                    
-                    if 'pe' in header or 'p/e' in header:
-                        pe_match = re.search(r'(\d+\.?\d*)', value)
-                        if pe_match:
-                            pe_ratio = pe_match.group(1)
-            
-            return {'price': price, 'pe_ratio': pe_ratio, 'source': 'screener.in'}
+            return {'price': data['price'], 'pe_ratio': data['pe_ratio'], 'source': 'screener.in'}
             
         except Exception as e:
             print(f"Error getting data from screener: {e}")
@@ -143,30 +205,10 @@ class MarketDataScraper:
             response = self.session.get(url, timeout=15)
             response.raise_for_status()
             
-            soup = BeautifulSoup(response.content, 'html.parser')
-            
-            # Look for MMI value in various elements
-            mmi_value = 'N/A'
+            page_text = self._page_text('tickertape.in', response)
+            data = extract_fields('tickertape.in', page_text)
             
-            # Try to find MMI value in specific elements
-            mmi_elements = soup.find_all(['span', 'div', 'p'], text=re.compile(r'\d+'))
-            
-            for element in mmi_elements:
-                try:
-                    text = element.get_text().strip()
-                    # Look for numbers between 0-100
-                    numbers = re.findall(r'\b(\d+)\b', text)
-                    for num in numbers:
-                        value = int(num)
-                        if 0 <= value <= 100:
-                            mmi_value = value
-                            break
-                    if mmi_value != 'N/A':
-                        break
-                except:
-                    continue
-            
-            return {'value': mmi_value, 'source': 'tickertape.in'}
+            return {'value': data['value'], 'source': 'tickertape.in'}
             
         except Exception as e:
             print(f"Error getting MMI from tickertape: {e}")
@@ -179,51 +221,53 @@ class MarketDataScraper:
             response = self.session.get(url, timeout=15)
             response.raise_for_status()
             
-            soup = BeautifulSoup(response.content, 'html.parser')
-            
-            # Look for MMI value
-            mmi_value = 'N/A'
-            
-            # Search for MMI value patterns
-            page_text = soup.get_text()
-            mmi_patterns = [
-                r'MMI.*?(\d+)',
-                r'Market Mood Index.*?(\d+)',
-                r'Index.*?(\d+)',
-                r'current.*?(\d+)'
-            ]
-            
-            for pattern in mmi_patterns:
-                match = re.search(pattern, page_text, re.IGNORECASE)
-                if match:
-                    value = int(match.group(1))
-                    if 0 <= value <= 100:
-                        mmi_value = value
-                        break
+            page_text = self._page_text('goodreturns.in', response)
+            data = extract_fields('goodreturns.in', page_text)
             
-            return {'value': mmi_value, 'source': 'goodreturns.in'}
+            return {'value': data['value'], 'source': 'goodreturns.in'}
             
         except Exception as e:
             print(f"Error getting MMI from goodreturns: {e}")
             return {'value': 'Error', 'source': 'goodreturns.in'}
 
-    def scrape_nifty_pe_data(self):
+    def _fetch_source(self, source, record_failure=True):
+        """Call the scraper method behind a source, recording its metrics and health"""
+        with self.metrics.measure('source', source.name, retries=self._attempt) as event:
+            data = getattr(self, source.method)()
+            event['success'] = any(is_valid(data.get(field)) for field in source.fields)
+        if event['success'] or record_failure:
+            # Cache hits would drag the p90 that hedging waits on towards zero
+            self.health.record(source.name, event['success'], event['seconds'], network=event['requests'] > 0)
+        return data
+
+    def _hedge_delay(self, source):
+        """Seconds to give a source before hedging: its observed p90 latency"""
+        stats = self.health.stats(source.name)
+        if stats is None or stats['p90'] is None:
+            return HEDGE_DEFAULT_DELAY
+        return stats['p90']
+
+    def _collect(self, sources, fields, deadline):
+        """Fetch a source group in parallel, or hedged in hedged mode"""
+        if self.hedged:
+            return collect_hedged(
+                self.health.order(sources), self._fetch_source, fields, deadline, self._hedge_delay
+            )
+        return collect_concurrently(self.health.order(sources), self._fetch_source, fields, deadline)
+
+    def scrape_nifty_pe_data(self, deadline=None):
         """Scrape NIFTY 50 PE data from multiple sources"""
         print("Fetching NIFTY 50 data from multiple sources...")
         
-        # Try multiple sources
-        sources = [
-            self.get_nifty_data_from_finlive,
-            self.get_nifty_data_from_trendlyne,
-            self.get_nifty_data_from_screener,
-            self.get_nifty_data_from_api
-        ]
+        if self.concurrent:
+            return self._scrape_nifty_pe_data_concurrently(deadline)
         
+        # Try multiple sources, healthiest first
         best_data = {'price': 'N/A', 'pe_ratio': 'N/A', 'source': 'multiple'}
         
-        for source_func in sources:
+        for source in self.health.order(NIFTY_SOURCES):
             try:
-                data = source_func()
+                data = self._fetch_source(source)
                 print(f"Data from {data.get('source', 'unknown')}: {data}")
                 
                 # Use the first valid PE ratio found
@@ -238,30 +282,43 @@ class MarketDataScraper:
                 # If we have both values, we can stop
                 if best_data['price'] != 'N/A' and best_data['pe_ratio'] != 'N/A':
                     break
-                    
-                time.sleep(2)  # Be respectful to servers
                 
             except Exception as e:
-                print(f"Error with source {source_func.__name__}: {e}")
+                print(f"Error with source {source.name}: {e}")
                 continue
         
         return best_data
 
-    def scrape_mmi_data(self):
+    def _scrape_nifty_pe_data_concurrently(self, deadline=None):
+        """Query all NIFTY sources in parallel, keeping their priority order"""
+        if deadline is None:
+            deadline = time.monotonic() + self.deadline
+        
+        filled, results = self._collect(NIFTY_SOURCES, ('price', 'pe_ratio'), deadline)
+        for data in results.values():
+            print(f"Data from {data.get('source', 'unknown')}: {data}")
+        
+        best_data = {'price': 'N/A', 'pe_ratio': 'N/A', 'source': 'multiple'}
+        if 'price' in filled:
+            best_data['price'] = filled['price'][0]
+        if 'pe_ratio' in filled:
+            best_data['pe_ratio'], best_data['source'] = filled['pe_ratio']
+        
+        return best_data
+
+    def scrape_mmi_data(self, deadline=None):
         """Scrape Market Mood Index from multiple sources"""
         print("Fetching MMI data from multiple sources...")
         
-        # Try multiple sources
-        sources = [
-            self.get_mmi_data_from_tickertape,
-            self.get_mmi_data_from_goodreturns
-        ]
+        if self.concurrent:
+            return self._scrape_mmi_data_concurrently(deadline)
         
+        # Try multiple sources, healthiest first
         best_data = {'value': 'N/A', 'status': 'N/A', 'source': 'multiple'}
         
-        for source_func in sources:
+        for source in self.health.order(MMI_SOURCES):
             try:
-                data = source_func()
+                data = self._fetch_source(source)
                 print(f"MMI data from {data.get('source', 'unknown')}: {data}")
                 
                 # Use the first valid MMI value found
@@ -270,50 +327,128 @@ class MarketDataScraper:
                     best_data['status'] = self.get_mmi_status(data['value'])
                     best_data['source'] = data.get('source', 'unknown')
                     break
-                    
-                time.sleep(2)  # Be respectful to servers
                 
             except Exception as e:
-                print(f"Error with MMI source {source_func.__name__}: {e}")
+                print(f"Error with MMI source {source.name}: {e}")
                 continue
         
         return best_data
 
+    def _scrape_mmi_data_concurrently(self, deadline=None):
+        """Query all MMI sources in parallel, keeping their priority order"""
+        if deadline is None:
+            deadline = time.monotonic() + self.deadline
+        
+        filled, results = self._collect(MMI_SOURCES, ('value',), deadline)
+        for data in results.values():
+            print(f"MMI data from {data.get('source', 'unknown')}: {data}")
+        
+        best_data = {'value': 'N/A', 'status': 'N/A', 'source': 'multiple'}
+        if 'value' in filled:
+            best_data['value'], best_data['source'] = filled['value']
+            best_data['status'] = self.get_mmi_status(best_data['value'])
+        
+        return best_data
+
+    def scrape_all(self):
+        """Scrape NIFTY/PE and MMI data, all sources at once in concurrent mode"""
+        if not self.concurrent:
+            nifty_data = self.scrape_nifty_pe_data()
+            mmi_data = self.scrape_mmi_data()
+            return nifty_data, mmi_data
+        
+        # One deadline shared by both source groups
+        deadline = time.monotonic() + self.deadline
+        with ThreadPoolExecutor(max_workers=2) as executor:
+            nifty_future = executor.submit(self.scrape_nifty_pe_data, deadline)
+            mmi_future = executor.submit(self.scrape_mmi_data, deadline)
+            return nifty_future.result(), mmi_future.result()
+
+    def _fetch_retry(self, source, attempt):
+        """_fetch_source for a retry round, so metrics count it as one.
+        
+        A retry always goes over the wire, since the cached copy is the page
+        that just failed. Its failure isn't recorded in source health: the
+        first round already counted this run against the source.
+        """
+        self._attempt = attempt
+        with self.session.bypass_cache():
+            return self._fetch_source(source, record_failure=False)
+
+    def retry_missing_fields(self, nifty_data, mmi_data):
+        """Re-query only the sources that can fill the fields still missing.
+
+        Fields already scraped are kept, so sources that answered are not
+        fetched again. Retry rounds back off with jitter and every host has
+        a retry budget (see fanout.retry_missing). Returns updated copies of
+        the two dicts.
+        """
+        nifty_data = dict(nifty_data)
+        mmi_data = dict(mmi_data)
+        filled = {field: (nifty_data[field], nifty_data.get('source'))
+                  for field in ('price', 'pe_ratio') if is_valid(nifty_data.get(field))}
+        if is_valid(mmi_data.get('value')):
+            filled['value'] = (mmi_data['value'], mmi_data.get('source'))
+        
+        fields = ('price', 'pe_ratio', 'value')
+        if len(filled) == len(fields):
+            return nifty_data, mmi_data
+        
+        sources = self.health.order(NIFTY_SOURCES) + self.health.order(MMI_SOURCES)
+        retry_missing(
+            sources, self._fetch_retry, fields, filled, time.monotonic() + self.deadline,
+            attempts=RETRY_ATTEMPTS, host_budget=RETRY_HOST_BUDGET,
+            max_workers=None if self.concurrent else 1
+        )
+        self._attempt = 0
+        
+        if 'price' in filled:
+            nifty_data['price'] = filled['price'][0]
+        if 'pe_ratio' in filled:
+            nifty_data['pe_ratio'], nifty_data['source'] = filled['pe_ratio']
+        if 'value' in filled:
+            mmi_data['value'], mmi_data['source'] = filled['value']
+            mmi_data['status'] = self.get_mmi_status(mmi_data['value'])
+        
+        return nifty_data, mmi_data
+
     def get_mmi_status(self, mmi_value):
         """Determine market status based on MMI value"""
-        if isinstance(mmi_value, str) or mmi_value == 'N/A':
+        if isinstance(mmi_value, str) or mmi_value is None:
             return 'Unknown'
         
-        if mmi_value >= 75:
-            return 'Extreme Greed'
-        elif mmi_value >= 60:
-            return 'Greed'
-        elif mmi_value >= 40:
-            return 'Neutral'
-        elif mmi_value >= 25:
-            return 'Fear'
-        else:
-            return 'Extreme Fear'
+        return MMI_STATUS[MMI_ZONES.index(mmi_value)]
 
     def generate_market_insights(self, nifty_data, mmi_data):
+        """Generate insights from scraped dicts (adapter for snapshot_insights)"""
+        return self.snapshot_insights(MarketSnapshot.from_scraped(nifty_data, mmi_data))
+
+    def get_watchlist_quotes(self, symbols=None):
+        """Columnar quotes for the watchlist (default list plus WATCHLIST_SYMBOLS)"""
+        if symbols is None:
+            extra = os.environ.get('WATCHLIST_SYMBOLS', '')
+            symbols = DEFAULT_WATCHLIST + tuple(s.strip() for s in extra.split(',') if s.strip())
+        with self.metrics.measure('source', 'Yahoo Finance spark') as event:
+            quotes = self.quotes.fetch(symbols)
+            event['success'] = bool((quotes.price == quotes.price).any())
+        return quotes
+
+    def snapshot_insights(self, snapshot):
         """Generate market insights and recommendations"""
         insights = []
         
         # PE Ratio Analysis
-        try:
-            pe_ratio = float(nifty_data['pe_ratio']) if nifty_data['pe_ratio'] != 'N/A' else None
-            if pe_ratio:
-                if pe_ratio > 25:
-                    insights.append("🔴 High PE Ratio - Market may be overvalued")
-                elif pe_ratio > 20:
-                    insights.append("🟡 Moderate PE Ratio - Fair valuation")
-                else:
-                    insights.append("🟢 Low PE Ratio - Potential undervaluation")
-        except:
-            insights.append("⚠️ PE Ratio analysis unavailable")
+        pe_ratio = snapshot.pe_ratio
+        if pe_ratio:
+            if pe_ratio > 25:
+                insights.append("🔴 High PE Ratio - Market may be overvalued")
+            elif pe_ratio > 20:
+                insights.append("🟡 Moderate PE Ratio - Fair valuation")
+            else:
+                insights.append("🟢 Low PE Ratio - Potential undervaluation")
         
         # MMI Analysis
-        mmi_status = mmi_data['status']
+        mmi_status = snapshot.mmi_status
         if mmi_status == 'Extreme Greed':
             insights.append("🔴 Extreme Greed - Consider booking profits")
         elif mmi_status == 'Greed':
@@ -348,7 +483,7 @@ class MarketDataScraper:
         try:
             # Yahoo Finance API for NIFTY 50
             url = "https://query1.finance.yahoo.com/v8/finance/chart/^NSEI"
-            response = self.session.get(url, timeout=10)
+            response = self.session.get(url, params={'interval': '1m', 'range': '1d'}, timeout=10)
             response.raise_for_status()
             
             data = response.json()
@@ -361,6 +496,12 @@ class MarketDataScraper:
                 if 'meta' in result and 'regularMarketPrice' in result['meta']:
                     current_price = str(round(result['meta']['regularMarketPrice'], 2))
                 
+                # The same payload carries the day's minute bars; keep the new ones
+                try:
+                    self.intraday.ingest_chart(result)
+                except Exception as e:
+                    print(f"Error ingesting intraday bars: {e}")
+                
                 return {'price': current_price, 'pe_ratio': 'N/A', 'source': 'Yahoo Finance API'}
             
             return {'price': 'N/A', 'pe_ratio': 'N/A', 'source': 'Yahoo Finance API'}
@@ -369,22 +510,36 @@ class MarketDataScraper:
             print(f"Error getting data from Yahoo Finance API: {e}")
             return {'price': 'Error', 'pe_ratio': 'Error', 'source': 'Yahoo Finance API'}
 
+    def record_snapshot(self, snapshot):
+        """Append the snapshot to the local history store"""
+        try:
+            self.history.append(
+                snapshot.values(),
+                source=f"{snapshot.sources.get('pe_ratio')}/{snapshot.sources.get('mmi')}",
+                timestamp=snapshot.timestamp
+            )
+        except Exception as e:
+            print(f"Error saving snapshot to history: {e}")
+
     def format_message(self, nifty_data, mmi_data):
+        """Format scraped dicts for Telegram (adapter for format_report)"""
+        return self.format_report(MarketSnapshot.from_scraped(nifty_data, mmi_data))
+
+    def format_report(self, snapshot):
         """Format the complete message for Telegram"""
         current_time = datetime.now().strftime("%d %b %Y, %I:%M %p")
         
-        insights, recommendations = self.generate_market_insights(nifty_data, mmi_data)
+        insights, recommendations = self.snapshot_insights(snapshot)
         
         # Format data sources
-        nifty_source = nifty_data.get('source', 'unknown')
-        mmi_source = mmi_data.get('source', 'unknown')
+        nifty_source = snapshot.sources.get('pe_ratio') or 'unknown'
         
         message = f"""📊 **Daily Market Report**
 📅 {current_time}
 
 **NIFTY 50 Data:**
-💰 Price: {nifty_data['price']}
-📊 PE Ratio: {nifty_data['pe_ratio']}
+💰 Price: {snapshot.display('nifty_price')}
+📊 PE Ratio: {snapshot.display('pe_ratio')}
 📍 Source: {nifty_source}
 
 **Market Insights:**
@@ -399,86 +554,101 @@ class MarketDataScraper:
         return message
 
     def send_telegram_message(self, message):
-        """Send message to Telegram"""
-        try:
-            url = f"https://api.telegram.org/bot{self.telegram_bot_token}/sendMessage"
-            data = {
-                'chat_id': self.telegram_chat_id,
-                'text': message,
-                'parse_mode': 'Markdown'
-            }
-            
-            response = requests.post(url, data=data, timeout=10)
-            response.raise_for_status()
-            
+        """Send message to every configured Telegram chat"""
+        results = self.delivery.broadcast(message, self.telegram_chat_ids)
+        delivered = sum(result is not None for result in results.values())
+        
+        if results and delivered == len(results):
             print("Message sent successfully!")
             return True
+        
+        print(f"Error sending Telegram message: delivered to {delivered}/{len(results)} chats")
+        return False
+
+    def send_report(self, snapshot):
+        """Send the report; returns (success, changed) where changed is False if delta mode skipped it"""
+        message = self.format_report(snapshot)
+        if not self.delta:
+            return self.send_telegram_message(message), True
+        
+        success, changed = deliver_update(
+            self.delivery, self.reports, self.telegram_chat_ids, message, snapshot.values()
+        )
+        if not changed:
+            print("No material change since the last report; nothing sent")
+        elif success:
+            print("Report updated successfully!")
+        else:
+            print("Error updating the report in some Telegram chats")
+        return success, changed
+
+    def poll(self, send=True):
+        """One intraday tick: a single round of fetches, recorded and optionally sent"""
+        self._attempt = 0
+        try:
+            snapshot = MarketSnapshot.from_scraped(*self.scrape_all())
+            
+            if len(snapshot.missing(REPORT_FIELDS)) < len(REPORT_FIELDS):
+                self.record_snapshot(snapshot)
+                if send:
+                    self.send_report(snapshot)
             
         except Exception as e:
-            print(f"Error sending Telegram message: {e}")
-            return False
+            print(f"Intraday poll failed with error: {e}")
+        
+        finally:
+            self.health.save()
+            self.metrics.export()
 
     def run(self):
-        """Main execution function"""
+        """Main execution function; returns whether the report was sent"""
         print("Starting market data scraping...")
         
-        # Scrape data with retries
-        max_retries = 3
-        for attempt in range(max_retries):
-            try:
-                print(f"Attempt {attempt + 1}/{max_retries}")
-                
-                # Scrape data
-                nifty_data = self.scrape_nifty_pe_data()
-                time.sleep(3)  # Be respectful to servers
-                mmi_data = self.scrape_mmi_data()
-                
-                # Check if we got some valid data
-                valid_data = (
-                    nifty_data.get('price') not in ['N/A', 'Error'] or 
-                    nifty_data.get('pe_ratio') not in ['N/A', 'Error'] or
-                    mmi_data.get('value') not in ['N/A', 'Error']
-                )
+        success = False
+        try:
+            # Scrape once, then retry only the fields still missing
+            nifty_data, mmi_data = self.retry_missing_fields(*self.scrape_all())
+            snapshot = MarketSnapshot.from_scraped(nifty_data, mmi_data)
+            
+            # Check if we got some valid data
+            missing = snapshot.missing(REPORT_FIELDS)
+            if len(missing) < len(REPORT_FIELDS):
+                self.record_snapshot(snapshot)
+            
+            # Format and send message
+            success, changed = self.send_report(snapshot)
+            
+            if success:
+                print("Daily market report sent successfully!")
                 
-                if valid_data or attempt == max_retries - 1:
-                    # Format and send message
-                    message = self.format_message(nifty_data, mmi_data)
-                    success = self.send_telegram_message(message)
-                    
-                    if success:
-                        print("Daily market report sent successfully!")
-                        
-                        # Send debug info if data is incomplete
-                        if nifty_data.get('price') == 'N/A' or nifty_data.get('pe_ratio') == 'N/A' or mmi_data.get('value') == 'N/A':
-                            debug_message = f"""🔧 **Debug Info**
-NIFTY Price: {nifty_data.get('price')}
-NIFTY PE: {nifty_data.get('pe_ratio')}
-MMI Value: {mmi_data.get('value')}
+                # Send debug info if data is incomplete (and not already reported)
+                if changed and missing:
+                    debug_message = f"""🔧 **Debug Info**
+NIFTY Price: {snapshot.display('nifty_price')}
+NIFTY PE: {snapshot.display('pe_ratio')}
+MMI Value: {snapshot.display('mmi', '.0f')}
 
 Some data might be missing due to website changes. The bot will continue to improve data accuracy."""
-                            self.send_telegram_message(debug_message)
-                    else:
-                        print("Failed to send daily market report.")
-                    
-                    break
-                else:
-                    print(f"Attempt {attempt + 1} failed, retrying...")
-                    time.sleep(5)
-                    
-            except Exception as e:
-                print(f"Attempt {attempt + 1} failed with error: {e}")
-                if attempt == max_retries - 1:
-                    # Send error message
-                    error_message = f"""❌ **Market Data Bot Error**
-Unable to fetch complete market data after {max_retries} attempts.
+                    self.send_telegram_message(debug_message)
+            else:
+                print("Failed to send daily market report.")
+                
+        except Exception as e:
+            print(f"Market data scraping failed with error: {e}")
+            # Send error message
+            error_message = f"""❌ **Market Data Bot Error**
+Unable to fetch complete market data.
 
 Error: {str(e)[:100]}...
 
 The bot will retry in the next scheduled run."""
-                    self.send_telegram_message(error_message)
-                else:
-                    time.sleep(5)
+            self.send_telegram_message(error_message)
+        
+        self.health.save()
+        self.metrics.export()
+        return success
 
 if __name__ == "__main__":
-    scraper = MarketDataScraper()
+    startup_profile.mark('ready')
+    scraper = MarketDataScraper(hedged=os.environ.get('HEDGED_REQUESTS') == '1')
     scraper.run()
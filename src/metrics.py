@@ -0,0 +1,161 @@
+import os
+import json
+import time
+import logging
+import threading
+import contextvars
+from contextlib import contextmanager
+
+from state_dir import atomic_write, state_path
+
+logger = logging.getLogger(__name__)
+
+
+class MetricsRecorder:
+    """Collects one event per source call, analysis step or Telegram send.
+
+    Use `measure()` around the call; HTTP responses that pass through
+    `response_hook` while it is open are added to the same event, so bytes,
+    status and fetch time are attributed to the right source even when
+    sources run in parallel threads. The open event is context-local: work a
+    call fans out to other threads is counted in it when each task runs in a
+    copy of the caller's context (contextvars.copy_context().run).
+    """
+
+    def __init__(self):
+        self.events = []
+        self.run_started = time.time()
+        self._lock = threading.Lock()
+        self._event = contextvars.ContextVar(f'metrics_event_{id(self)}', default=None)
+
+    @contextmanager
+    def measure(self, kind, name, retries=0):
+        """Time a block and yield its event dict so the caller can set 'success'"""
+        event = {
+            'timestamp': time.time(),
+            'kind': kind,
+            'name': name,
+            'seconds': 0.0,
+            'fetch_seconds': 0.0,
+            'parse_seconds': 0.0,
+            'requests': 0,
+            'cache_hits': 0,
+            'bytes': 0,
+            'status': None,
+            'success': False,
+            'retries': retries
+        }
+        token = self._event.set(event)
+        start = time.perf_counter()
+        try:
+            yield event
+        finally:
+            event['seconds'] = time.perf_counter() - start
+            # Whatever wasn't spent on the wire went to parsing/extraction
+            event['parse_seconds'] = max(event['seconds'] - event['fetch_seconds'], 0.0)
+            self._event.reset(token)
+            with self._lock:
+                self.events.append(event)
+
+    def response_hook(self, response, *args, **kwargs):
+        """requests response hook that adds each response to the open event"""
+        event = self._event.get()
+        if event is not None:
+            size = len(response.content)
+            # Fanned-out workers may share one event
+            with self._lock:
+                if getattr(response, 'from_cache', False):
+                    event['cache_hits'] += 1
+                else:
+                    event['requests'] += 1
+                    event['fetch_seconds'] += response.elapsed.total_seconds()
+                event['bytes'] += size
+                event['status'] = response.status_code
+        return response
+
+    def instrument(self, session):
+        """Attach the response hook to a requests session"""
+        session.hooks['response'].append(self.response_hook)
+        return session
+
+    def summary(self):
+        """Aggregate events per (kind, name): totals, last status, any success"""
+        totals = {}
+        for event in self.events:
+            key = (event['kind'], event['name'])
+            total = totals.setdefault(key, {
+                'seconds': 0.0, 'bytes': 0, 'requests': 0, 'cache_hits': 0,
+                'attempts': 0, 'success': False, 'status': None
+            })
+            total['seconds'] += event['seconds']
+            total['bytes'] += event['bytes']
+            total['requests'] += event['requests']
+            total['cache_hits'] += event['cache_hits']
+            total['attempts'] += 1
+            total['success'] = total['success'] or event['success']
+            if event['status'] is not None:
+                total['status'] = event['status']
+        return totals
+
+    def write_jsonl(self, path):
+        """Append every event of this run as one JSON line"""
+        with open(path, 'a') as f:
+            for event in self.events:
+                f.write(json.dumps(dict(event, run_started=self.run_started)) + '\n')
+
+    def write_prometheus(self, path):
+        """Write this run's metrics in node exporter textfile format"""
+        metrics = (
+            ('market_bot_call_duration_seconds', 'gauge', 'Wall time spent in the call', 'seconds'),
+            ('market_bot_call_response_bytes', 'gauge', 'Response bytes received', 'bytes'),
+            ('market_bot_call_requests', 'gauge', 'HTTP requests made', 'requests'),
+            ('market_bot_call_cache_hits', 'gauge', 'Responses served from the HTTP cache', 'cache_hits'),
+            ('market_bot_call_attempts', 'gauge', 'Times the call ran, including retries', 'attempts'),
+            ('market_bot_call_success', 'gauge', '1 if the call produced usable data', 'success'),
+            ('market_bot_call_http_status', 'gauge', 'Last HTTP status seen', 'status'),
+        )
+        summary = self.summary()
+
+        lines = []
+        for metric, metric_type, help_text, field in metrics:
+            lines.append(f"# HELP {metric} {help_text}")
+            lines.append(f"# TYPE {metric} {metric_type}")
+            for (kind, name), total in sorted(summary.items()):
+                value = total[field]
+                if value is None:
+                    continue
+                label_name = name.replace('\\', '\\\\').replace('"', '\\"')
+                lines.append(f'{metric}{{kind="{kind}",name="{label_name}"}} {float(value)}')
+        lines.append('# HELP market_bot_last_run_timestamp_seconds When the last run started')
+        lines.append('# TYPE market_bot_last_run_timestamp_seconds gauge')
+        lines.append(f"market_bot_last_run_timestamp_seconds {self.run_started}")
+
+        # Write then rename so the node exporter never reads a half-written file
+        atomic_write(path, '\n'.join(lines) + '\n')
+
+    def reset(self):
+        """Drop recorded events and start a new run"""
+        with self._lock:
+            self.events = []
+        self.run_started = time.time()
+
+    def export(self):
+        """Write this run to the configured JSON lines file and Prometheus textfile.
+
+        The recorder is reset afterwards so a long-lived scraper exports each
+        run or tick exactly once.
+        """
+        try:
+            self.write_jsonl(os.environ.get('METRICS_JSONL_PATH') or state_path('metrics.jsonl'))
+
+            textfile_dir = os.environ.get('PROMETHEUS_TEXTFILE_DIR')
+            if textfile_dir:
+                prom_path = os.path.join(textfile_dir, 'market_bot.prom')
+            else:
+                prom_path = state_path('market_bot.prom')
+            self.write_prometheus(prom_path)
+
+        except Exception as e:
+            logger.error(f"Error exporting metrics: {e}")
+
+        self.reset()
@@ -0,0 +1,139 @@
+import json
+import time
+import logging
+import threading
+from urllib.parse import urlsplit
+
+import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+
+from state_dir import atomic_write
+
+logger = logging.getLogger(__name__)
+
+NSE_HOST = 'www.nseindia.com'
+NSE_HOME_URL = f"https://{NSE_HOST}/"
+
+# NSE's bot protection hands out short-lived cookies; a jar older than this is
+# warmed up again even if some of its cookies claim to live longer
+COOKIE_JAR_MAX_AGE = 2 * 3600
+
+# NSE's API expects to be called from its own pages
+NSE_HEADERS = {'Referer': NSE_HOME_URL, 'Accept': 'application/json, text/plain, */*'}
+
+# NSE answers cold or stale clients with one of these instead of JSON
+REJECTED_STATUSES = (401, 403)
+
+# Connection pools per site: NSE and TickerTape are queried a few times per
+# run over keep-alive connections; moneycontrol is a one-off fallback page.
+# Retries cover only connection errors and gateway hiccups, never a 4xx.
+HOST_ADAPTERS = {
+    f"https://{NSE_HOST}": {'pool_maxsize': 4, 'retries': 1},
+    'https://api.tickertape.in': {'pool_maxsize': 2, 'retries': 1},
+    'https://www.tickertape.in': {'pool_maxsize': 2, 'retries': 1},
+    'https://www.moneycontrol.com': {'pool_maxsize': 1, 'retries': 0},
+}
+
+
+def _adapter(pool_maxsize, retries):
+    return HTTPAdapter(
+        pool_connections=1,
+        pool_maxsize=pool_maxsize,
+        max_retries=Retry(total=retries, backoff_factor=0.3, status_forcelist=(502, 503, 504),
+                          allowed_methods=('GET',), raise_on_status=False)
+    )
+
+
+class NSESession(requests.Session):
+    """requests.Session that arrives at NSE's API with the cookies it expects.
+
+    Before the first NSE API call the cookie jar is loaded from `jar_path`;
+    if there is no usable jar, one homepage hit collects fresh cookies. The
+    jar is saved after every accepted NSE response, so later runs skip the
+    warm-up until the cookies expire. A 401/403 with reused cookies warms up
+    again and retries once. Every host in HOST_ADAPTERS gets its own
+    keep-alive pool.
+    """
+
+    def __init__(self, jar_path, max_age=COOKIE_JAR_MAX_AGE, timeout=10):
+        super().__init__()
+        self.jar_path = jar_path
+        self.max_age = max_age
+        self.timeout = timeout
+        for prefix, settings in HOST_ADAPTERS.items():
+            self.mount(prefix, _adapter(**settings))
+        self._warm = False
+        self._reused = False  # cookies came from the jar file, not a warm-up
+        self._jar_checked = False
+        self._lock = threading.Lock()
+
+    def _load_cookies(self):
+        """Restore the saved jar if it is recent enough; returns whether anything was loaded"""
+        try:
+            with open(self.jar_path) as f:
+                saved = json.load(f)
+        except (OSError, ValueError):
+            return False
+
+        now = time.time()
+        if now - saved.get('saved_at', 0) >= self.max_age:
+            return False
+        cookies = [c for c in saved.get('cookies', []) if c.get('expires') is None or c['expires'] > now]
+        for cookie in cookies:
+            self.cookies.set(cookie['name'], cookie['value'], domain=cookie['domain'],
+                             path=cookie['path'], expires=cookie['expires'], secure=cookie['secure'])
+        return bool(cookies)
+
+    def save_cookies(self):
+        """Write NSE's cookies to the jar file"""
+        cookies = [
+            {'name': c.name, 'value': c.value, 'domain': c.domain, 'path': c.path,
+             'expires': c.expires, 'secure': c.secure}
+            for c in self.cookies if c.domain.lstrip('.').endswith('nseindia.com')
+        ]
+        try:
+            atomic_write(self.jar_path, json.dumps({'saved_at': time.time(), 'cookies': cookies}))
+        except OSError as e:
+            logger.warning(f"Could not save NSE cookies: {e}")
+
+    def warm_up(self):
+        """Collect fresh NSE cookies with a single homepage hit"""
+        self._clear_nse_cookies()
+        try:
+            response = super().request('GET', NSE_HOME_URL, timeout=self.timeout)
+            logger.info(f"NSE warm-up: HTTP {response.status_code}, {len(self.cookies)} cookie(s)")
+        except requests.RequestException as e:
+            logger.warning(f"NSE warm-up failed: {e}")
+        self._warm = True
+        self._reused = False
+
+    def _clear_nse_cookies(self):
+        for cookie in list(self.cookies):
+            if cookie.domain.lstrip('.').endswith('nseindia.com'):
+                self.cookies.clear(cookie.domain, cookie.path, cookie.name)
+
+    def request(self, method, url, **kwargs):
+        if urlsplit(url).hostname != NSE_HOST:
+            return super().request(method, url, **kwargs)
+
+        kwargs.setdefault('timeout', self.timeout)
+        kwargs['headers'] = dict(NSE_HEADERS, **(kwargs.get('headers') or {}))
+        with self._lock:
+            if not self._jar_checked:
+                self._jar_checked = True
+                self._warm = self._reused = self._load_cookies()
+            if not self._warm:
+                self.warm_up()
+            reused = self._reused
+
+        response = super().request(method, url, **kwargs)
+        if response.status_code in REJECTED_STATUSES and reused:
+            logger.info("Saved NSE cookies were rejected, warming up again")
+            with self._lock:
+                self.warm_up()
+            response = super().request(method, url, **kwargs)
+
+        if response.ok:
+            self.save_cookies()
+        return response
@@ -0,0 +1,40 @@
+import time
+import threading
+from urllib.parse import urlsplit
+
+
+class HostScheduler:
+    """Minimum interval between request starts, kept separately for every host.
+
+    A caller reserves the host's next free slot and sleeps until it, so
+    requests to one host are spaced `interval` seconds apart while requests
+    to different hosts never wait on each other. Thread-safe, so concurrent
+    sources to distinct sites all go out at once.
+    """
+
+    def __init__(self, intervals=None, default_interval=2.0):
+        self.intervals = intervals or {}
+        self.default_interval = default_interval
+        self._next_slot = {}  # host -> time.monotonic() its next request may start
+        self._lock = threading.Lock()
+
+    def interval_for(self, url):
+        """Seconds to keep between requests to this URL's host"""
+        return self.intervals.get(urlsplit(url).hostname, self.default_interval)
+
+    def reserve(self, url):
+        """Claim the host's next slot and return how many seconds to wait for it"""
+        host = urlsplit(url).hostname
+        interval = self.interval_for(url)
+        with self._lock:
+            now = time.monotonic()
+            start = max(now, self._next_slot.get(host, now))
+            self._next_slot[host] = start + interval
+            return start - now
+
+    def wait(self, url):
+        """Block until a request to this URL's host may go out; returns the seconds waited"""
+        delay = self.reserve(url)
+        if delay > 0:
+            time.sleep(delay)
+        return delay
@@ -0,0 +1,101 @@
+import logging
+import contextvars
+from collections import namedtuple
+from urllib.parse import urlsplit
+from concurrent.futures import ThreadPoolExecutor
+
+logger = logging.getLogger(__name__)
+
+# Yahoo's spark endpoint returns many symbols per request (it rejects more than 20)
+SPARK_URL = "https://query1.finance.yahoo.com/v7/finance/spark"
+SPARK_BATCH_SIZE = 20
+
+# NIFTY 50, Bank Nifty and the main NSE sector indices
+DEFAULT_WATCHLIST = (
+    '^NSEI', '^NSEBANK', 'NIFTY_FIN_SERVICE.NS', '^CNXIT', '^CNXAUTO', '^CNXFMCG',
+    '^CNXPHARMA', '^CNXMETAL', '^CNXREALTY', '^CNXENERGY', '^CNXMEDIA', '^CNXPSUBANK',
+)
+
+# Columnar quotes: `symbols` is a tuple and every other field is a float64
+# NumPy array in the same order, NaN where a symbol had no quote
+Quotes = namedtuple('Quotes', ['symbols', 'price', 'previous_close', 'change', 'change_pct', 'timestamp'])
+
+
+def _parse_spark(payload):
+    """{symbol: (price, previous_close, timestamp)} from a spark response"""
+    quotes = {}
+    for item in (payload.get('spark') or {}).get('result') or []:
+        for response in item.get('response') or []:
+            meta = response.get('meta') or {}
+            price = meta.get('regularMarketPrice')
+            if price is None:
+                # Fall back to the last close the chart has
+                closes = ((response.get('indicators') or {}).get('quote') or [{}])[0].get('close') or []
+                price = next((close for close in reversed(closes) if close is not None), None)
+            previous = meta.get('chartPreviousClose', meta.get('previousClose'))
+            quotes[item.get('symbol') or meta.get('symbol')] = (price, previous, meta.get('regularMarketTime'))
+    return quotes
+
+
+class QuoteFetcher:
+    """Fetches quotes for many symbols in as few requests as the endpoint allows.
+
+    Symbols go out in spark batches of `batch_size`; all batches are in
+    flight at once over one pooled session, so 300 symbols cost about one
+    round trip more than a single symbol. Pass the scraper's session to get
+    its HTTP cache and metrics; either way the endpoint's host gets a
+    connection pool with room for every worker.
+    """
+
+    def __init__(self, session=None, batch_size=SPARK_BATCH_SIZE, workers=16, url=SPARK_URL):
+        import requests
+        from requests.adapters import HTTPAdapter
+
+        if session is None:
+            session = requests.Session()
+        parts = urlsplit(url)
+        session.mount(f"{parts.scheme}://{parts.netloc}", HTTPAdapter(pool_connections=1, pool_maxsize=workers))
+        self.session = session
+        self.batch_size = batch_size
+        self.workers = workers
+        self.url = url
+
+    def _fetch_batch(self, symbols):
+        try:
+            response = self.session.get(
+                self.url,
+                params={'symbols': ','.join(symbols), 'range': '1d', 'interval': '1d'},
+                timeout=10
+            )
+            response.raise_for_status()
+            return _parse_spark(response.json())
+        except Exception as e:
+            logger.error(f"Error fetching quotes for {', '.join(symbols)}: {e}")
+            return {}
+
+    def fetch(self, symbols=DEFAULT_WATCHLIST):
+        """Quotes for `symbols` (duplicates dropped, order kept)"""
+        import numpy as np
+
+        symbols = tuple(dict.fromkeys(symbols))
+        batches = [symbols[i:i + self.batch_size] for i in range(0, len(symbols), self.batch_size)]
+
+        found = {}
+        if len(batches) == 1:
+            found.update(self._fetch_batch(batches[0]))
+        elif batches:
+            # Each batch runs in a copy of the caller's context, so an open
+            # metrics event sees the workers' requests
+            contexts = [contextvars.copy_context() for _ in batches]
+            with ThreadPoolExecutor(max_workers=min(self.workers, len(batches))) as executor:
+                for result in executor.map(lambda context, batch: context.run(self._fetch_batch, batch),
+                                           contexts, batches):
+                    found.update(result)
+
+        missing = (None, None, None)
+        columns = np.array([found.get(symbol, missing) for symbol in symbols], dtype=np.float64).reshape(-1, 3)
+        price, previous_close, timestamp = columns.T
+        change = price - previous_close
+        with np.errstate(divide='ignore', invalid='ignore'):
+            change_pct = change / previous_close * 100
+        return Quotes(symbols, price, previous_close, change, change_pct, timestamp)
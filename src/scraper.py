@@ -1,43 +1,193 @@
-import requests
-from bs4 import BeautifulSoup
+import os
 import json
+import re
 import time
+import atexit
 import logging
-from selenium import webdriver
-from selenium.webdriver.chrome.options import Options
-from selenium.webdriver.common.by import By
-from selenium.webdriver.support.ui import WebDriverWait
-from selenium.webdriver.support import expected_conditions as EC
-from webdriver_manager.chrome import ChromeDriverManager
+from zones import MMI_ZONES, MMI_STATUS
+from state_dir import state_path
+
+# requests, bs4, selenium and webdriver_manager are imported where they are
+# first needed, so a run that never falls back to scraping never loads them
 
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
+MMI_API_URL = "https://api.tickertape.in/mmi/now"
+MMI_PAGE_URL = "https://www.tickertape.in/market-mood-index"
+
+# Next.js pages ship their initial state as JSON in this script tag
+NEXT_DATA_PATTERN = re.compile(
+    r'<script[^>]*id="__NEXT_DATA__"[^>]*>(.*?)</script>', re.DOTALL
+)
+
+# Keys TickerTape has used for the current MMI reading, most specific first
+MMI_VALUE_KEYS = ('currentValue', 'indicator')
+
+# Headless Chrome is expensive, so the fallback keeps one driver per process
+_chromedriver_path = None
+_chrome_driver = None
+
+# Where the resolved chromedriver binary path is remembered between runs,
+# and how long to trust it before asking webdriver_manager again
+CHROMEDRIVER_CACHE = 'chromedriver.json'
+CHROMEDRIVER_CACHE_TTL = 7 * 24 * 3600
+
+# NSE's cookies are kept here between runs (see nse_session.NSESession)
+NSE_COOKIE_JAR = 'nse_cookies.json'
+
+
+def _find_mmi_value(data):
+    """Find the first plausible MMI reading (0-100) in a decoded JSON payload"""
+    if isinstance(data, dict):
+        for key in MMI_VALUE_KEYS:
+            value = data.get(key)
+            if isinstance(value, (int, float)) and not isinstance(value, bool) and 0 <= value <= 100:
+                return float(value)
+        children = data.values()
+    elif isinstance(data, list):
+        children = data
+    else:
+        return None
+    
+    for child in children:
+        value = _find_mmi_value(child)
+        if value is not None:
+            return value
+    return None
+
+
+def _mmi_status(mmi_value):
+    """Name the MMI zone a value falls in"""
+    return MMI_STATUS[MMI_ZONES.index(mmi_value)]
+
+
+def _chromedriver():
+    """Path to chromedriver, resolved by webdriver_manager once and then cached on disk"""
+    global _chromedriver_path
+    
+    if _chromedriver_path is None:
+        cache_file = state_path(CHROMEDRIVER_CACHE)
+        try:
+            with open(cache_file) as f:
+                cached = json.load(f)
+            fresh = time.time() - cached.get('resolved_at', 0) < CHROMEDRIVER_CACHE_TTL
+            if fresh and cached.get('path') and os.access(cached['path'], os.X_OK):
+                _chromedriver_path = cached['path']
+        except (OSError, ValueError):
+            pass
+    
+    if _chromedriver_path is None:
+        from webdriver_manager.chrome import ChromeDriverManager
+        _chromedriver_path = ChromeDriverManager().install()
+        try:
+            with open(state_path(CHROMEDRIVER_CACHE), 'w') as f:
+                json.dump({'path': _chromedriver_path, 'resolved_at': time.time()}, f)
+        except OSError as e:
+            logger.warning(f"Could not cache chromedriver path: {e}")
+    
+    return _chromedriver_path
+
+
+def _forget_chromedriver():
+    """Drop the cached chromedriver path so the next start resolves it again"""
+    global _chromedriver_path
+    
+    _chromedriver_path = None
+    try:
+        os.remove(state_path(CHROMEDRIVER_CACHE))
+    except OSError:
+        pass
+
+
+def _get_chrome_driver():
+    """Start headless Chrome on first use and reuse it afterwards"""
+    global _chrome_driver
+    
+    if _chrome_driver is None:
+        from selenium import webdriver
+        from selenium.webdriver.chrome.options import Options
+        
+        chrome_options = Options()
+        chrome_options.add_argument('--headless')
+        chrome_options.add_argument('--no-sandbox')
+        chrome_options.add_argument('--disable-dev-shm-usage')
+        
+        try:
+            _chrome_driver = webdriver.Chrome(_chromedriver(), options=chrome_options)
+        except Exception:
+            # The cached driver may no longer match the installed Chrome
+            _forget_chromedriver()
+            raise
+        atexit.register(_quit_chrome_driver)
+    
+    return _chrome_driver
+
+
+def _quit_chrome_driver():
+    """Shut down the shared Chrome driver"""
+    global _chrome_driver
+    
+    if _chrome_driver is not None:
+        try:
+            _chrome_driver.quit()
+        finally:
+            _chrome_driver = None
+
 class MarketDataScraper:
     def __init__(self):
-        self.session = requests.Session()
-        self.session.headers.update({
-            'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/91.0.4472.124 Safari/537.36'
-        })
+        self._session = None
+        # allIndices snapshot keyed by index name, fetched once per run
+        self._indices = None
+    
+    @property
+    def session(self):
+        """HTTP session with NSE's cookies and per-host pools, created (and requests imported) on first use"""
+        if self._session is None:
+            from nse_session import NSESession
+            self._session = NSESession(state_path(NSE_COOKIE_JAR))
+            self._session.headers.update({
+                'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/91.0.4472.124 Safari/537.36'
+            })
+        return self._session
+    
+    def _load_all_indices(self):
+        """Fetch NSE's allIndices payload once and index it by name"""
+        if self._indices is None:
+            self._indices = {}
+            try:
+                url = "https://www.nseindia.com/api/allIndices"
+                response = self.session.get(url)
+                
+                if response.status_code == 200:
+                    data = response.json()
+                    self._indices = {index['index']: index for index in data['data']}
+                    
+            except Exception as e:
+                logger.error(f"Error fetching allIndices: {e}")
+        
+        return self._indices
+    
+    def refresh_indices(self):
+        """Drop the current allIndices snapshot so the next lookup refetches it"""
+        self._indices = None
+    
+    def get_index(self, name):
+        """Get one index entry (e.g. 'NIFTY 50', 'NIFTY BANK') from the snapshot"""
+        return self._load_all_indices().get(name)
     
     def get_nifty_data(self):
         """Scrape NIFTY 50 data from NSE or reliable source"""
         try:
-            # Using NSE API endpoint
-            url = "https://www.nseindia.com/api/allIndices"
-            response = self.session.get(url)
-            
-            if response.status_code == 200:
-                data = response.json()
-                for index in data['data']:
-                    if index['index'] == 'NIFTY 50':
-                        return {
-                            'name': 'NIFTY 50',
-                            'current_price': index['last'],
-                            'change': index['change'],
-                            'change_percent': index['percentChange'],
-                            'pe_ratio': index.get('pe', 'N/A')  # May not be available
-                        }
+            index = self.get_index('NIFTY 50')
+            if index:
+                return {
+                    'name': 'NIFTY 50',
+                    'current_price': index['last'],
+                    'change': index['change'],
+                    'change_percent': index['percentChange'],
+                    'pe_ratio': index.get('pe', 'N/A')  # May not be available
+                }
             
             # Fallback to web scraping
             return self._scrape_nifty_fallback()
@@ -49,6 +199,8 @@ class MarketDataScraper:
     def _scrape_nifty_fallback(self):
         """Fallback method using web scraping"""
         try:
+            from bs4 import BeautifulSoup
+            
             url = "https://www.moneycontrol.com/indian-indices/nifty-50-9.html"
             response = self.session.get(url)
             soup = BeautifulSoup(response.content, 'html.parser')
@@ -76,38 +228,74 @@ class MarketDataScraper:
     def get_nifty_vix(self):
         """Scrape NIFTY VIX data"""
         try:
-            url = "https://www.nseindia.com/api/allIndices"
-            response = self.session.get(url)
+            index = self.get_index('INDIA VIX')
+            if index is None:
+                index = next(
+                    (entry for name, entry in self._load_all_indices().items() if 'VIX' in name),
+                    None
+                )
             
-            if response.status_code == 200:
-                data = response.json()
-                for index in data['data']:
-                    if 'VIX' in index['index']:
-                        return {
-                            'name': 'NIFTY VIX',
-                            'current_value': index['last'],
-                            'change': index['change'],
-                            'change_percent': index['percentChange']
-                        }
+            if index:
+                return {
+                    'name': 'NIFTY VIX',
+                    'current_value': index['last'],
+                    'change': index['change'],
+                    'change_percent': index['percentChange']
+                }
             
         except Exception as e:
             logger.error(f"Error fetching VIX data: {e}")
             return None
     
     def get_mmi_data(self):
-        """Scrape MMI data from TickerTape"""
-        chrome_options = Options()
-        chrome_options.add_argument('--headless')
-        chrome_options.add_argument('--no-sandbox')
-        chrome_options.add_argument('--disable-dev-shm-usage')
+        """Get MMI data from TickerTape, using headless Chrome only as a fallback"""
+        mmi_value = self._get_mmi_from_api()
+        if mmi_value is None:
+            mmi_value = self._get_mmi_from_page()
         
+        if mmi_value is not None:
+            return {
+                'mmi_value': str(int(round(mmi_value))),
+                'mmi_status': _mmi_status(mmi_value)
+            }
+        
+        return self._get_mmi_with_browser()
+    
+    def _get_mmi_from_api(self):
+        """Read the current MMI from TickerTape's JSON API"""
         try:
-            driver = webdriver.Chrome(
-                ChromeDriverManager().install(),
-                options=chrome_options
-            )
+            response = self.session.get(MMI_API_URL, timeout=10)
+            response.raise_for_status()
+            return _find_mmi_value(response.json().get('data'))
+            
+        except Exception as e:
+            logger.error(f"Error fetching MMI from API: {e}")
+            return None
+    
+    def _get_mmi_from_page(self):
+        """Read the current MMI from the JSON state embedded in the MMI page"""
+        try:
+            response = self.session.get(MMI_PAGE_URL, timeout=10)
+            response.raise_for_status()
             
-            driver.get("https://www.tickertape.in/market-mood-index")
+            match = NEXT_DATA_PATTERN.search(response.text)
+            if match:
+                return _find_mmi_value(json.loads(match.group(1)))
+            
+        except Exception as e:
+            logger.error(f"Error fetching MMI from page data: {e}")
+        return None
+    
+    def _get_mmi_with_browser(self):
+        """Scrape MMI data from the rendered TickerTape page"""
+        try:
+            from selenium.webdriver.common.by import By
+            from selenium.webdriver.support.ui import WebDriverWait
+            from selenium.webdriver.support import expected_conditions as EC
+            
+            driver = _get_chrome_driver()
+            
+            driver.get(MMI_PAGE_URL)
             
             # Wait for the page to load
             wait = WebDriverWait(driver, 10)
@@ -123,8 +311,6 @@ class MarketDataScraper:
             status_element = driver.find_element(By.CSS_SELECTOR, "[data-testid='mmi-status']")
             mmi_status = status_element.text.strip()
             
-            driver.quit()
-            
             return {
                 'mmi_value': mmi_value,
                 'mmi_status': mmi_status
@@ -132,8 +318,8 @@ class MarketDataScraper:
             
         except Exception as e:
             logger.error(f"Error fetching MMI data: {e}")
-            if 'driver' in locals():
-                driver.quit()
+            # Don't keep reusing a driver that may be wedged
+            _quit_chrome_driver()
             return None
     
     def get_pe_ratio(self):
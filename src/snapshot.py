@@ -0,0 +1,104 @@
+import time
+
+# Numeric market values, in history table column order
+SNAPSHOT_FIELDS = (
+    'nifty_price',
+    'nifty_change',
+    'nifty_change_pct',
+    'pe_ratio',
+    'vix',
+    'vix_change',
+    'vix_change_pct',
+    'mmi',
+)
+
+
+def to_number(value):
+    """Turn a scraped value ('24,812.45', '0.45%', 46, 'N/A') into a float or None"""
+    if value is None or isinstance(value, bool):
+        return None
+    if isinstance(value, (int, float)):
+        return float(value)
+    try:
+        return float(str(value).replace(',', '').replace('%', '').strip())
+    except ValueError:
+        return None
+
+
+class MarketSnapshot:
+    """One normalized market reading, parsed once where the scrapers hand it over.
+
+    Every SNAPSHOT_FIELDS value is a float, or None when no source supplied
+    it, so 'N/A', 'Error', '24,812.45' and '0.45%' never travel past the
+    scraper boundary. `sources` maps a field to the source it came from and
+    `timestamp` is when the reading was taken (epoch seconds).
+    """
+
+    __slots__ = SNAPSHOT_FIELDS + ('mmi_status', 'sources', 'timestamp')
+
+    def __init__(self, values=None, mmi_status=None, sources=None, timestamp=None):
+        values = values or {}
+        for field in SNAPSHOT_FIELDS:
+            setattr(self, field, to_number(values.get(field)))
+        self.mmi_status = mmi_status
+        self.sources = dict(sources or {})
+        self.timestamp = time.time() if timestamp is None else timestamp
+
+    @classmethod
+    def from_scraped(cls, nifty_data, mmi_data):
+        """Adapter for market_scraper's {'price', 'pe_ratio', 'source'} / {'value', 'status', 'source'} dicts"""
+        nifty_data = nifty_data or {}
+        mmi_data = mmi_data or {}
+        status = mmi_data.get('status')
+        return cls(
+            {
+                'nifty_price': nifty_data.get('price'),
+                'pe_ratio': nifty_data.get('pe_ratio'),
+                'mmi': mmi_data.get('value')
+            },
+            mmi_status=status if status not in (None, 'N/A', 'Unknown') else None,
+            sources={
+                'nifty_price': nifty_data.get('source'),
+                'pe_ratio': nifty_data.get('source'),
+                'mmi': mmi_data.get('source')
+            }
+        )
+
+    @classmethod
+    def from_nse(cls, nifty_data, vix_data, mmi_data):
+        """Adapter for scraper.py's NIFTY, VIX and MMI dicts (any of which may be None)"""
+        nifty_data = nifty_data or {}
+        vix_data = vix_data or {}
+        mmi_data = mmi_data or {}
+        return cls(
+            {
+                'nifty_price': nifty_data.get('current_price'),
+                'nifty_change': nifty_data.get('change'),
+                'nifty_change_pct': nifty_data.get('change_percent'),
+                'pe_ratio': nifty_data.get('pe_ratio'),
+                'vix': vix_data.get('current_value'),
+                'vix_change': vix_data.get('change'),
+                'vix_change_pct': vix_data.get('change_percent'),
+                'mmi': mmi_data.get('mmi_value')
+            },
+            mmi_status=mmi_data.get('mmi_status'),
+            sources=dict({field: 'nse' for field in SNAPSHOT_FIELDS}, mmi='tickertape')
+        )
+
+    def values(self):
+        """{field: float or None}, the shape HistoryStore, ReportTracker and indicators take"""
+        return {field: getattr(self, field) for field in SNAPSHOT_FIELDS}
+
+    def missing(self, fields=SNAPSHOT_FIELDS):
+        """The given fields that have no value"""
+        return [field for field in fields if getattr(self, field) is None]
+
+    def display(self, field, spec=',.2f'):
+        """A field formatted for a message, or 'N/A' when missing"""
+        value = getattr(self, field)
+        return 'N/A' if value is None else format(value, spec)
+
+    def __repr__(self):
+        present = ', '.join(f"{field}={getattr(self, field)}" for field in SNAPSHOT_FIELDS
+                            if getattr(self, field) is not None)
+        return f"MarketSnapshot({present})"
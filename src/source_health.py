@@ -0,0 +1,138 @@
+import json
+import math
+import time
+import logging
+import threading
+
+from state_dir import atomic_write
+
+logger = logging.getLogger(__name__)
+
+
+def percentile(values, fraction):
+    """Nearest-rank percentile of a list of numbers (None if empty)"""
+    if not values:
+        return None
+    ordered = sorted(values)
+    return ordered[max(math.ceil(fraction * len(ordered)) - 1, 0)]
+
+
+class SourceHealth:
+    """Persisted success/latency record per source with a circuit breaker.
+
+    After `failure_threshold` consecutive failures a source's circuit opens
+    and it is skipped until its cool-down passes. The next call is then a
+    probe: success closes the circuit, failure re-opens it with twice the
+    cool-down (capped at `max_cooldown`).
+    """
+
+    def __init__(self, path, window=50, failure_threshold=3,
+                 cooldown=6 * 3600, max_cooldown=7 * 24 * 3600):
+        self.path = path
+        self.window = window
+        self.failure_threshold = failure_threshold
+        self.cooldown = cooldown
+        self.max_cooldown = max_cooldown
+        self._lock = threading.Lock()
+        self._records = self._load()
+
+    def _load(self):
+        try:
+            with open(self.path) as f:
+                return json.load(f)
+        except (OSError, ValueError):
+            return {}
+
+    def save(self):
+        """Write the record to disk"""
+        try:
+            with self._lock:
+                atomic_write(self.path, json.dumps(self._records))
+        except OSError as e:
+            logger.error(f"Error saving source health: {e}")
+
+    def _record_for(self, name):
+        return self._records.setdefault(name, {
+            'outcomes': [],
+            'latencies': [],
+            'consecutive_failures': 0,
+            'last_success': None,
+            'last_failure': None,
+            'open_until': None,
+            'cooldown': self.cooldown
+        })
+
+    def record(self, name, success, seconds, network=True):
+        """Add one call's outcome and latency.
+
+        Pass network=False when the call was served from the HTTP cache: it
+        counts towards the outcome but its latency says nothing about the site.
+        """
+        now = time.time()
+        with self._lock:
+            record = self._record_for(name)
+            record['outcomes'] = (record['outcomes'] + [1 if success else 0])[-self.window:]
+            if network:
+                record['latencies'] = (record['latencies'] + [round(seconds, 3)])[-self.window:]
+
+            if success:
+                record['last_success'] = now
+                record['consecutive_failures'] = 0
+                record['open_until'] = None
+                record['cooldown'] = self.cooldown
+                return
+
+            record['last_failure'] = now
+            record['consecutive_failures'] += 1
+            if record['open_until'] is not None:
+                # A failed probe: back off harder before the next one
+                record['cooldown'] = min(record['cooldown'] * 2, self.max_cooldown)
+            if record['consecutive_failures'] >= self.failure_threshold:
+                record['open_until'] = now + record['cooldown']
+                logger.warning(f"Circuit open for {name} for {record['cooldown']}s")
+
+    def stats(self, name):
+        """Success rate, p50/p90/p95 latency and last failure for a source"""
+        with self._lock:
+            record = self._records.get(name)
+            if record is None:
+                return None
+            outcomes = list(record['outcomes'])
+            latencies = list(record['latencies'])
+            last_failure = record['last_failure']
+            open_until = record['open_until']
+
+        return {
+            # Laplace-smoothed so a source with little history sits in the middle
+            'success_rate': (sum(outcomes) + 1) / (len(outcomes) + 2),
+            'calls': len(outcomes),
+            'p50': percentile(latencies, 0.50),
+            'p90': percentile(latencies, 0.90),
+            'p95': percentile(latencies, 0.95),
+            'last_failure': last_failure,
+            'circuit_open': open_until is not None
+        }
+
+    def allow(self, name, now=None):
+        """Whether a source may be called: closed circuit, or cool-down over"""
+        now = time.time() if now is None else now
+        with self._lock:
+            record = self._records.get(name)
+            return record is None or record['open_until'] is None or now >= record['open_until']
+
+    def order(self, sources):
+        """Drop sources whose circuit is open and put the healthiest first.
+
+        Sources are ranked by success rate in steps of 0.1, keeping their
+        configured priority within a step. If every circuit is open all
+        sources are returned, since an empty report is worse than a slow one.
+        """
+        allowed = [source for source in sources if self.allow(source.name)] or list(sources)
+
+        def rank(indexed):
+            index, source = indexed
+            stats = self.stats(source.name)
+            rate = 0.5 if stats is None else stats['success_rate']
+            return (-round(rate, 1), index)
+
+        return [source for _, source in sorted(enumerate(allowed), key=rank)]
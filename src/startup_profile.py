@@ -0,0 +1,60 @@
+"""Import-time profiling behind a --startup-profile command-line flag.
+
+Import this module before anything else in an entry point. If the flag is
+on the command line, every later first-time import is timed. At exit a
+report goes to stderr listing the slowest top-level imports and the marks
+the entry point recorded (e.g. 'ready' once its imports are done). The flag
+is removed from sys.argv so the entry point's own argument parsing never
+sees it. Without the flag nothing is installed.
+"""
+import sys
+import time
+import atexit
+import builtins
+
+FLAG = '--startup-profile'
+
+_started = time.perf_counter()
+_original_import = builtins.__import__
+_imports = []  # (name, seconds, depth, phase)
+_marks = []  # (label, seconds since this module loaded)
+_depth = 0
+enabled = False
+
+
+def _timed_import(name, globals=None, locals=None, fromlist=(), level=0):
+    global _depth
+    if level or name in sys.modules:
+        return _original_import(name, globals, locals, fromlist, level)
+
+    _depth += 1
+    start = time.perf_counter()
+    try:
+        return _original_import(name, globals, locals, fromlist, level)
+    finally:
+        _depth -= 1
+        _imports.append((name, time.perf_counter() - start, _depth, f"after {_marks[-1][0]}" if _marks else 'startup'))
+
+
+def mark(label):
+    """Record how long after startup `label` was reached"""
+    if enabled:
+        _marks.append((label, time.perf_counter() - _started))
+
+
+def report(top=15, file=None):
+    """Print the slowest top-level imports and the recorded marks"""
+    file = file or sys.stderr
+    outermost = sorted((entry for entry in _imports if entry[2] == 0), key=lambda entry: -entry[1])
+    print(f"Startup profile: {len(_imports)} modules imported", file=file)
+    for name, seconds, _, phase in outermost[:top]:
+        print(f"  {seconds * 1000:9.1f} ms  {name}  ({phase})", file=file)
+    for label, seconds in _marks:
+        print(f"  {label} after {seconds * 1000:.1f} ms", file=file)
+
+
+if FLAG in sys.argv:
+    sys.argv.remove(FLAG)
+    enabled = True
+    builtins.__import__ = _timed_import
+    atexit.register(report)
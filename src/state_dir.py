@@ -0,0 +1,24 @@
+import os
+from datetime import timedelta, timezone
+
+# Where the bot keeps state between runs (HTTP cache, source health, history...)
+DEFAULT_STATE_DIR = '.cache'
+
+# Indian Standard Time: market hours, report days and daily bars all use it
+IST = timezone(timedelta(hours=5, minutes=30))
+
+
+def state_path(*parts):
+    """Build a path inside the bot's state directory, creating its parent"""
+    root = os.environ.get('MARKET_BOT_STATE_DIR', DEFAULT_STATE_DIR)
+    path = os.path.join(root, *parts)
+    os.makedirs(os.path.dirname(path) or '.', exist_ok=True)
+    return path
+
+
+def atomic_write(path, data):
+    """Write text to `path` through a temp file and a rename, so readers never see half of it"""
+    tmp_path = path + '.tmp'
+    with open(tmp_path, 'w') as f:
+        f.write(data)
+    os.replace(tmp_path, path)
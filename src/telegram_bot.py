@@ -1,45 +1,62 @@
 import os
 import logging
-from telegram import Bot
-from telegram.error import TelegramError
+from telegram_delivery import TelegramDelivery, chat_ids_from_env
+from change_detection import ReportTracker, deliver_update
+from state_dir import state_path
+from snapshot import MarketSnapshot
+from zones import MMI_ZONES
 
 logger = logging.getLogger(__name__)
 
+# One emoji per MMI zone, in zone order
+MMI_EMOJIS = (
+    "😱",  # Extreme Fear
+    "😟",  # Fear
+    "😐",  # Neutral
+    "😊",  # Greed
+    "🤑",  # Extreme Greed
+)
+
 class TelegramNotifier:
     def __init__(self):
         self.bot_token = os.getenv('TELEGRAM_BOT_TOKEN')
-        self.chat_id = os.getenv('TELEGRAM_CHAT_ID')
-        self.bot = Bot(token=self.bot_token)
+        self.chat_ids = chat_ids_from_env()
+        self.delivery = TelegramDelivery(self.bot_token)
+        self.reports = ReportTracker(state_path('last_nse_report.json'))
     
     def format_message(self, nifty_data, vix_data, mmi_data, analysis):
+        """Format scraper.py's dicts into a message (adapter for format_snapshot)"""
+        return self.format_snapshot(MarketSnapshot.from_nse(nifty_data, vix_data, mmi_data), analysis)
+    
+    def format_snapshot(self, snapshot, analysis):
         """Format the market data into a nice message"""
         
         message = "📊 *Daily Market Update*\n"
         message += "=" * 30 + "\n\n"
         
         # NIFTY 50 Data
-        if nifty_data:
-            change_emoji = "📈" if float(str(nifty_data['change_percent']).replace('%', '')) > 0 else "📉"
+        if snapshot.nifty_price is not None:
+            change_emoji = "📈" if (snapshot.nifty_change_pct or 0) > 0 else "📉"
             message += f"🔹 *NIFTY 50*\n"
-            message += f"   Price: {nifty_data['current_price']}\n"
-            message += f"   Change: {nifty_data['change']} ({nifty_data['change_percent']}) {change_emoji}\n"
-            if nifty_data['pe_ratio'] != 'N/A':
-                message += f"   PE Ratio: {nifty_data['pe_ratio']}\n"
+            message += f"   Price: {snapshot.display('nifty_price')}\n"
+            message += f"   Change: {snapshot.display('nifty_change', '+,.2f')} ({snapshot.display('nifty_change_pct', '+.2f')}%) {change_emoji}\n"
+            if snapshot.pe_ratio is not None:
+                message += f"   PE Ratio: {snapshot.display('pe_ratio')}\n"
             message += "\n"
         
         # NIFTY VIX Data
-        if vix_data:
-            vix_emoji = "😰" if float(vix_data['current_value']) > 20 else "😌"
+        if snapshot.vix is not None:
+            vix_emoji = "😰" if snapshot.vix > 20 else "😌"
             message += f"🔹 *NIFTY VIX*\n"
-            message += f"   Value: {vix_data['current_value']} {vix_emoji}\n"
-            message += f"   Change: {vix_data['change']} ({vix_data['change_percent']})\n\n"
+            message += f"   Value: {snapshot.display('vix')} {vix_emoji}\n"
+            message += f"   Change: {snapshot.display('vix_change', '+.2f')} ({snapshot.display('vix_change_pct', '+.2f')}%)\n\n"
         
         # MMI Data
-        if mmi_data:
-            mmi_emoji = self._get_mmi_emoji(mmi_data['mmi_value'])
+        if snapshot.mmi is not None:
+            mmi_emoji = self._get_mmi_emoji(snapshot.mmi)
             message += f"🔹 *Market Mood Index*\n"
-            message += f"   Value: {mmi_data['mmi_value']} {mmi_emoji}\n"
-            message += f"   Status: {mmi_data['mmi_status']}\n\n"
+            message += f"   Value: {snapshot.display('mmi', '.0f')} {mmi_emoji}\n"
+            message += f"   Status: {snapshot.mmi_status or 'N/A'}\n\n"
         
         # Analysis and Recommendations
         message += "📈 *Market Analysis*\n"
@@ -60,32 +77,28 @@ class TelegramNotifier:
         return message
     
     def _get_mmi_emoji(self, mmi_value):
-        """Get emoji based on MMI value"""
-        try:
-            value = int(mmi_value) if str(mmi_value).isdigit() else 50
-            if value < 25:
-                return "😱"  # Extreme Fear
-            elif value < 40:
-                return "😟"  # Fear
-            elif value < 60:
-                return "😐"  # Neutral
-            elif value < 75:
-                return "😊"  # Greed
-            else:
-                return "🤑"  # Extreme Greed
-        except:
-            return "😐"
+        """Get emoji based on a numeric MMI value (None reads as neutral)"""
+        return MMI_EMOJIS[MMI_ZONES.index(mmi_value)]
     
     def send_message(self, message):
-        """Send message to Telegram"""
-        try:
-            self.bot.send_message(
-                chat_id=self.chat_id,
-                text=message,
-                parse_mode='Markdown'
-            )
-            logger.info("Message sent successfully to Telegram")
+        """Send message to every configured Telegram chat"""
+        results = self.delivery.broadcast(message, self.chat_ids)
+        failed = [str(chat_id) for chat_id, result in results.items() if result is None]
+        
+        if results and not failed:
+            logger.info(f"Message sent successfully to {len(results)} Telegram chat(s)")
             return True
-        except TelegramError as e:
-            logger.error(f"Failed to send Telegram message: {e}")
-            return False
+        
+        logger.error(f"Failed to send Telegram message to: {', '.join(failed) or 'no chats configured'}")
+        return False
+    
+    def send_update(self, message, values):
+        """Delta mode send: skip if `values` haven't materially changed, else edit today's message"""
+        success, changed = deliver_update(self.delivery, self.reports, self.chat_ids, message, values)
+        if not changed:
+            logger.info("No material change since the last update; nothing sent")
+        elif success:
+            logger.info(f"Market update delivered to {len(self.chat_ids)} Telegram chat(s)")
+        else:
+            logger.error("Failed to deliver the market update to every Telegram chat")
+        return success
@@ -0,0 +1,154 @@
+import os
+import time
+import logging
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+import requests
+from requests.adapters import HTTPAdapter
+
+logger = logging.getLogger(__name__)
+
+TELEGRAM_API_URL = "https://api.telegram.org"
+
+# Bot API limits: ~30 messages/s overall, 1/s to one chat, 20/min to a group or channel
+GLOBAL_RATE = 30.0
+PRIVATE_CHAT_RATE = 1.0
+GROUP_CHAT_RATE = 20 / 60.0
+
+
+def chat_ids_from_env():
+    """Chats to deliver to: TELEGRAM_CHAT_IDS (comma-separated) or TELEGRAM_CHAT_ID"""
+    chat_ids = os.environ.get('TELEGRAM_CHAT_IDS') or os.environ.get('TELEGRAM_CHAT_ID') or ''
+    return [chat_id.strip() for chat_id in chat_ids.split(',') if chat_id.strip()]
+
+
+class TokenBucket:
+    """Thread-safe token bucket where callers reserve a token and sleep off the debt"""
+
+    def __init__(self, rate, capacity=1.0):
+        self.rate = rate
+        self.capacity = capacity
+        self._tokens = capacity
+        self._updated = time.monotonic()
+        self._lock = threading.Lock()
+
+    def _refill(self):
+        now = time.monotonic()
+        self._tokens = min(self.capacity, self._tokens + (now - self._updated) * self.rate)
+        self._updated = now
+
+    def reserve(self):
+        """Take a token and return how many seconds to wait before using it"""
+        with self._lock:
+            self._refill()
+            self._tokens -= 1
+            return 0.0 if self._tokens >= 0 else -self._tokens / self.rate
+
+    def pause(self, seconds):
+        """Hold the bucket empty for `seconds` (e.g. after a 429 retry_after)"""
+        with self._lock:
+            self._refill()
+            self._tokens = min(self._tokens, 0.0) - seconds * self.rate
+
+
+class TelegramDelivery:
+    """Send queue for Bot API calls, fanned out over a pooled session.
+
+    Calls are queued on a worker pool and each worker waits for both the
+    global bucket and the target chat's bucket before sending. A 429 reply
+    pauses that chat's bucket for `retry_after` seconds and the call is
+    retried, up to `max_retries` times.
+    """
+
+    def __init__(self, token, workers=8, max_retries=3, api_url=TELEGRAM_API_URL, metrics=None):
+        self.token = token
+        self.api_url = api_url
+        self.max_retries = max_retries
+        self.metrics = metrics
+        self.session = requests.Session()
+        adapter = HTTPAdapter(pool_connections=1, pool_maxsize=workers)
+        self.session.mount('https://', adapter)
+        if metrics is not None:
+            metrics.instrument(self.session)
+        self._executor = ThreadPoolExecutor(max_workers=workers, thread_name_prefix='telegram')
+        self._global_bucket = TokenBucket(GLOBAL_RATE, capacity=GLOBAL_RATE)
+        self._chat_buckets = {}
+        self._buckets_lock = threading.Lock()
+
+    def _chat_bucket(self, chat_id):
+        with self._buckets_lock:
+            bucket = self._chat_buckets.get(chat_id)
+            if bucket is None:
+                # Group and channel ids are negative and have the tighter limit
+                rate = GROUP_CHAT_RATE if str(chat_id).startswith('-') else PRIVATE_CHAT_RATE
+                bucket = self._chat_buckets[chat_id] = TokenBucket(rate)
+            return bucket
+
+    def submit(self, method, payload):
+        """Queue a Bot API call; the Future resolves to its result or None"""
+        return self._executor.submit(self._call, method, payload)
+
+    def send_message(self, chat_id, text, parse_mode='Markdown', **extra):
+        """Queue a sendMessage; the Future resolves to the sent message or None"""
+        return self.submit('sendMessage', dict(extra, chat_id=chat_id, text=text, parse_mode=parse_mode))
+
+    def edit_message(self, chat_id, message_id, text, parse_mode='Markdown', **extra):
+        """Queue an editMessageText of an earlier message; resolves like send_message"""
+        return self.submit('editMessageText', dict(
+            extra, chat_id=chat_id, message_id=message_id, text=text, parse_mode=parse_mode
+        ))
+
+    def broadcast(self, text, chat_ids, parse_mode='Markdown', **extra):
+        """Send the same text to every chat concurrently; returns {chat_id: message or None}"""
+        futures = {chat_id: self.send_message(chat_id, text, parse_mode, **extra) for chat_id in chat_ids}
+        return {chat_id: future.result() for chat_id, future in futures.items()}
+
+    def _call(self, method, payload):
+        if self.metrics is None:
+            return self._call_with_retries(method, payload, None)
+        with self.metrics.measure('telegram', method) as event:
+            result = self._call_with_retries(method, payload, event)
+            event['success'] = result is not None
+            return result
+
+    def _call_with_retries(self, method, payload, event):
+        url = f"{self.api_url}/bot{self.token}/{method}"
+        chat_bucket = self._chat_bucket(payload.get('chat_id'))
+
+        for attempt in range(self.max_retries + 1):
+            if event is not None:
+                event['retries'] = attempt
+            time.sleep(chat_bucket.reserve())
+            time.sleep(self._global_bucket.reserve())
+
+            try:
+                response = self.session.post(url, data=payload, timeout=10)
+                body = response.json()
+            except (requests.RequestException, ValueError) as e:
+                logger.error(f"Telegram {method} to {payload.get('chat_id')} failed: {e}")
+                time.sleep(min(2 ** attempt, 10))
+                continue
+
+            if response.status_code == 429:
+                retry_after = body.get('parameters', {}).get('retry_after', 1)
+                logger.warning(f"Telegram rate limited chat {payload.get('chat_id')}; retrying in {retry_after}s")
+                chat_bucket.pause(retry_after)
+                continue
+
+            if body.get('ok'):
+                return body['result']
+
+            logger.error(f"Telegram {method} to {payload.get('chat_id')} rejected: {body.get('description')}")
+            return None
+
+        return None
+
+    def reset_limits(self):
+        """Forget per-chat rate state, e.g. between benchmark iterations"""
+        with self._buckets_lock:
+            self._chat_buckets = {}
+
+    def close(self):
+        self._executor.shutdown(wait=True)
+        self.session.close()
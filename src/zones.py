@@ -0,0 +1,88 @@
+import math
+from bisect import bisect_right
+
+
+def above(x):
+    """The smallest float greater than x, for zones that start strictly above x"""
+    return math.nextafter(x, math.inf)
+
+
+class Zones:
+    """Labelled, left-closed intervals covering the real line.
+
+    bounds (b0 < b1 < ...) split it into (-inf, b0), [b0, b1), ..., [bn, inf)
+    and labels name those intervals in order. A value's zone index is a
+    bisect over the bounds; classify_array does the same for a whole NumPy
+    array with searchsorted. None and NaN fall in the `missing` zone.
+    """
+
+    __slots__ = ('bounds', 'labels', 'missing')
+
+    def __init__(self, bounds, labels, missing=None):
+        bounds = tuple(float(bound) for bound in bounds)
+        if len(labels) != len(bounds) + 1:
+            raise ValueError(f"{len(bounds)} bounds need {len(bounds) + 1} labels, got {len(labels)}")
+        if any(lo >= hi for lo, hi in zip(bounds, bounds[1:])):
+            raise ValueError(f"Zone bounds must be strictly increasing: {bounds}")
+        self.bounds = bounds
+        self.labels = tuple(labels)
+        self.missing = self.labels.index(missing) if missing is not None else None
+
+    def index(self, value):
+        """Zone index of one value"""
+        if value is None or value != value:
+            return self.missing
+        return bisect_right(self.bounds, value)
+
+    def classify(self, value):
+        """Zone label of one value"""
+        index = self.index(value)
+        return None if index is None else self.labels[index]
+
+    def index_array(self, values):
+        """int8 zone index of every element of an array (NaN gets the missing zone)"""
+        import numpy as np
+
+        values = np.asarray(values, dtype=np.float64)
+        indexes = np.searchsorted(np.array(self.bounds), values, side='right').astype(np.int8)
+        if self.missing is not None:
+            indexes[np.isnan(values)] = self.missing
+        return indexes
+
+    def __repr__(self):
+        return f"Zones({self.bounds}, {self.labels})"
+
+
+def nifty_zones(bullish=0.5, strong=2):
+    """NIFTY day change %: a move must exceed (not just reach) a threshold"""
+    return Zones(
+        (-strong, -bullish, above(bullish), above(strong)),
+        ('strong_bearish', 'bearish', 'neutral', 'bullish', 'strong_bullish'),
+        missing='neutral'
+    )
+
+
+def vix_zones(low=15, high=25):
+    """India VIX: below `low` is calm, above `high` is fearful"""
+    return Zones(
+        (low, above(high)),
+        ('low_volatility', 'normal_volatility', 'high_volatility'),
+        missing='normal_volatility'
+    )
+
+
+def mmi_zones(extreme_fear=25, fear=40, greed=60, extreme_greed=75):
+    """Tickertape Market Mood Index: each zone starts at its threshold"""
+    return Zones(
+        (extreme_fear, fear, greed, extreme_greed),
+        ('extreme_fear', 'fear', 'neutral', 'greed', 'extreme_greed'),
+        missing='neutral'
+    )
+
+
+NIFTY_ZONES = nifty_zones()
+VIX_ZONES = vix_zones()
+MMI_ZONES = mmi_zones()
+
+# Display names of the MMI zones, in zone order
+MMI_STATUS = ('Extreme Fear', 'Fear', 'Neutral', 'Greed', 'Extreme Greed')
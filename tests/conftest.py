@@ -0,0 +1,65 @@
+import os
+import sys
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import pytest
+
+# The bot's modules live flat in src/ and import each other by bare name
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'src'))
+
+
+class PageServer:
+    """Local HTTP server for one page whose body and ETag tests can change"""
+
+    def __init__(self):
+        self.body = b'version 1'
+        self.etag = '"v1"'
+        self.requests = []  # request headers, one dict per request
+        server = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = 'HTTP/1.1'
+
+            def do_GET(self):
+                server.requests.append(dict(self.headers))
+                if server.etag and self.headers.get('If-None-Match') == server.etag:
+                    self.send_response(304)
+                    self.send_header('ETag', server.etag)
+                    self.send_header('Content-Length', '0')
+                    self.end_headers()
+                    return
+                self.send_response(200)
+                if server.etag:
+                    self.send_header('ETag', server.etag)
+                self.send_header('Content-Length', str(len(server.body)))
+                self.end_headers()
+                self.wfile.write(server.body)
+
+            def log_message(self, format, *args):
+                pass
+
+        self._httpd = ThreadingHTTPServer(('127.0.0.1', 0), Handler)
+        self._httpd.daemon_threads = True
+        threading.Thread(target=self._httpd.serve_forever, daemon=True).start()
+        self.url = f"http://127.0.0.1:{self._httpd.server_port}/page"
+
+    def close(self):
+        self._httpd.shutdown()
+        self._httpd.server_close()
+
+
+@pytest.fixture
+def page_server():
+    server = PageServer()
+    yield server
+    server.close()
+
+
+@pytest.fixture
+def state_dir(tmp_path, monkeypatch):
+    """A fresh bot state directory for the test"""
+    monkeypatch.setenv('MARKET_BOT_STATE_DIR', str(tmp_path))
+    monkeypatch.delenv('HISTORY_DB_PATH', raising=False)
+    monkeypatch.delenv('HTTP_CACHE_DIR', raising=False)
+    return tmp_path
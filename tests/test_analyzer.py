@@ -0,0 +1,51 @@
+import itertools
+import math
+
+import numpy as np
+import pytest
+
+from analyzer import MarketAnalyzer, RECOMMENDATIONS, NIFTY_SIGNALS, VIX_SIGNALS, MMI_SIGNALS
+from backtest import DEFAULTS, build_analyzer
+
+
+def around_bounds(zones):
+    """Every zone bound, the floats on either side of it, half a point off, and NaN"""
+    values = {math.nan}
+    for bound in zones.bounds:
+        values.update((
+            bound, math.nextafter(bound, -math.inf), math.nextafter(bound, math.inf), bound - 0.5, bound + 0.5
+        ))
+    return sorted(values, key=lambda value: (math.isnan(value), value))
+
+
+@pytest.mark.parametrize('analyzer', [
+    MarketAnalyzer(),
+    build_analyzer(dict(DEFAULTS, nifty_weight=0.5, mmi_weight=1.5)),
+    build_analyzer(dict(DEFAULTS, nifty_strong=2.5, vix_low=13, mmi_greed=65, vix_weight=0.25)),
+    # Sums past int8's range must not wrap around
+    build_analyzer(dict(DEFAULTS, nifty_weight=30, vix_weight=30, mmi_weight=30)),
+], ids=['defaults', 'fractional-weights', 'custom-zones', 'large-weights'])
+def test_analyze_batch_matches_scalar_path(analyzer):
+    rows = list(itertools.product(
+        around_bounds(analyzer.nifty_zones), around_bounds(analyzer.vix_zones), around_bounds(analyzer.mmi_zones)
+    ))
+    change_pct, vix, mmi = (np.array(column) for column in zip(*rows))
+    batch = analyzer.analyze_batch(change_pct, vix, mmi)
+
+    for i, (nifty_value, vix_value, mmi_value) in enumerate(rows):
+        nifty_signal = analyzer.nifty_zones.classify(nifty_value)
+        vix_signal = analyzer.vix_zones.classify(vix_value)
+        mmi_signal = analyzer.mmi_zones.classify(mmi_value)
+        expected = analyzer._get_recommendation(nifty_signal, vix_signal, mmi_signal)
+
+        assert (NIFTY_SIGNALS[batch.nifty_signal[i]], VIX_SIGNALS[batch.vix_signal[i]],
+                MMI_SIGNALS[batch.mmi_signal[i]]) == (nifty_signal, vix_signal, mmi_signal), rows[i]
+        assert RECOMMENDATIONS[batch.category[i]] == expected, rows[i]
+
+
+def test_large_integer_weights_do_not_overflow():
+    analyzer = build_analyzer(dict(DEFAULTS, nifty_weight=30, vix_weight=30, mmi_weight=30))
+    # strong bullish (60) + low volatility (30) + extreme fear (60)
+    batch = analyzer.analyze_batch([3.0], [10.0], [10.0])
+    assert batch.score[0] == 150
+    assert RECOMMENDATIONS[batch.category[0]]['recommendation'] == 'BUY'
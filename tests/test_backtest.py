@@ -0,0 +1,45 @@
+import math
+
+import pytest
+
+from analyzer import RECOMMENDATIONS
+from backtest import DEFAULTS, build_analyzer
+
+
+def baseline_recommendation(score):
+    """The original if/elif rules the score cut-offs encode"""
+    if score >= 3:
+        return 'BUY'
+    if score >= 1:
+        return 'ACCUMULATE'
+    if score <= -3:
+        return 'SELL/REDUCE'
+    if score <= -1:
+        return 'HOLD/REDUCE'
+    return 'HOLD'
+
+
+@pytest.mark.parametrize('score', [-4, -3.5, -3, -2.5, -2, -1.5, -1, -0.5, 0, 0.5, 1, 1.5, 2, 2.5, 3, 3.5])
+def test_score_cutoffs_match_baseline_rules(score):
+    analyzer = build_analyzer(dict(DEFAULTS))
+    category = RECOMMENDATIONS[analyzer.score_zones.index(score)]['recommendation']
+    assert category == baseline_recommendation(score)
+
+
+def test_fractional_weight_keeps_baseline_category():
+    # Greed alone with half-weighted MMI scores -0.5, which is still HOLD
+    analyzer = build_analyzer(dict(DEFAULTS, mmi_weight=0.5))
+    result = analyzer._get_recommendation('neutral', 'normal_volatility', 'greed')
+    assert result['recommendation'] == 'HOLD'
+
+    batch = analyzer.analyze_batch([0.0], [20.0], [65.0])
+    assert batch.score[0] == -0.5
+    assert RECOMMENDATIONS[batch.category[0]]['recommendation'] == 'HOLD'
+
+
+def test_fractional_weight_at_sell_boundary():
+    # -2 (strong bearish) - 2 * 0.5 (extreme greed) = -3: SELL/REDUCE, as in the baseline
+    analyzer = build_analyzer(dict(DEFAULTS, mmi_weight=0.5))
+    result = analyzer._get_recommendation('strong_bearish', 'normal_volatility', 'extreme_greed')
+    assert result['recommendation'] == 'SELL/REDUCE'
+    assert math.isclose(analyzer.analyze_batch([-3.0], [20.0], [80.0]).score[0], -3)
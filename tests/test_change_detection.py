@@ -0,0 +1,86 @@
+from concurrent.futures import Future
+
+from change_detection import ReportTracker, deliver_update
+
+
+def _done(result):
+    future = Future()
+    future.set_result(result)
+    return future
+
+
+class FakeDelivery:
+    """Records calls; chats in `failing` get None back, as on a failed API call"""
+
+    def __init__(self, failing=()):
+        self.failing = set(failing)
+        self.calls = []
+        self._next_id = 100
+
+    def _reply(self, chat_id):
+        if chat_id in self.failing:
+            return _done(None)
+        self._next_id += 1
+        return _done({'message_id': self._next_id})
+
+    def send_message(self, chat_id, text):
+        self.calls.append(('send', chat_id))
+        return self._reply(chat_id)
+
+    def edit_message(self, chat_id, message_id, text):
+        self.calls.append(('edit', chat_id, message_id))
+        return self._reply(chat_id)
+
+
+VALUES = {'nifty_price': 24812.45, 'pe_ratio': 22.4, 'mmi': 46}
+
+
+def test_unchanged_report_is_skipped(tmp_path):
+    tracker = ReportTracker(str(tmp_path / 'last_report.json'))
+    delivery = FakeDelivery()
+
+    assert deliver_update(delivery, tracker, ['A', 'B'], 'report', VALUES) == (True, True)
+    assert deliver_update(delivery, tracker, ['A', 'B'], 'report', VALUES) == (True, False)
+    assert delivery.calls == [('send', 'A'), ('send', 'B')]
+
+
+def test_changed_report_edits_todays_message(tmp_path):
+    tracker = ReportTracker(str(tmp_path / 'last_report.json'))
+    delivery = FakeDelivery()
+    deliver_update(delivery, tracker, ['A'], 'report', VALUES)
+
+    moved = dict(VALUES, nifty_price=24900.0)
+    assert deliver_update(delivery, tracker, ['A'], 'report', moved) == (True, True)
+    assert delivery.calls == [('send', 'A'), ('edit', 'A', 101)]
+
+
+def test_failed_chat_is_retried_on_unchanged_values(tmp_path):
+    path = str(tmp_path / 'last_report.json')
+    tracker = ReportTracker(path)
+    delivery = FakeDelivery(failing={'B'})
+
+    assert deliver_update(delivery, tracker, ['A', 'B'], 'report', VALUES) == (False, True)
+
+    # Same values next tick: only the chat that missed the report is sent it
+    delivery.failing.clear()
+    delivery.calls.clear()
+    assert deliver_update(delivery, ReportTracker(path), ['A', 'B'], 'report', VALUES) == (True, True)
+    assert delivery.calls == [('send', 'B')]
+
+
+def test_failed_edit_keeps_the_earlier_message_id(tmp_path):
+    tracker = ReportTracker(str(tmp_path / 'last_report.json'))
+    delivery = FakeDelivery()
+    deliver_update(delivery, tracker, ['A', 'B'], 'report', VALUES)
+    assert tracker.messages_for_today() == {'A': 101, 'B': 102}
+
+    # B's edit and its fallback post both fail; B's morning message id survives
+    delivery.failing = {'B'}
+    moved = dict(VALUES, mmi=60)
+    assert deliver_update(delivery, tracker, ['A', 'B'], 'report', moved) == (False, True)
+    assert tracker.messages_for_today() == {'A': 103, 'B': 102}
+
+    delivery.failing.clear()
+    delivery.calls.clear()
+    deliver_update(delivery, tracker, ['A', 'B'], 'report', moved)
+    assert delivery.calls == [('edit', 'B', 102)]
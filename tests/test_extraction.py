@@ -0,0 +1,37 @@
+import pytest
+
+from extraction import ExtractionRule, SOURCE_RULES, extract
+
+
+MMI_RULES = SOURCE_RULES['goodreturns.in']['value']
+
+
+@pytest.mark.parametrize('filler', [55, 56, 57, 58])
+def test_number_straddling_the_window_edge_is_not_truncated(filler):
+    # '2024' starts inside the MMI rule's 60-character window but ends past it
+    text = "MMI " + "x" * filler + " 2024"
+    assert MMI_RULES[0].search(text) is None
+
+
+def test_number_inside_the_window_is_found():
+    assert MMI_RULES[0].search("MMI " + "x" * 50 + " 56 today") == 56
+
+
+def test_number_starting_past_the_window_is_ignored():
+    assert MMI_RULES[0].search("MMI " + "x" * 60 + " 56") is None
+
+
+def test_value_may_end_past_the_window():
+    # The window ends after '22.3'; the full number is read, not the truncated one
+    rule = ExtractionRule(r'PE is', r'(\d+\.\d+)', window=7)
+    assert rule.search("PE is   22.38") == '22.38'
+
+
+def test_search_stays_inside_the_window():
+    rule = ExtractionRule(r'PE is', r'(\d+\.\d+)', window=10)
+    assert rule.search("PE is " + "x" * 10 + " 22.38") is None
+
+
+def test_out_of_bounds_value_falls_through_to_next_anchor():
+    text = "MMI 2024 report. MMI 47"
+    assert extract(MMI_RULES, text) == 47
@@ -0,0 +1,116 @@
+import time
+
+from fanout import DataSource, merge_in_priority, collect_concurrently, retry_missing
+
+SOURCES = (
+    DataSource('finlive.in', 'www.finlive.in', ('pe_ratio',), None),
+    DataSource('trendlyne.com', 'trendlyne.com', ('price', 'pe_ratio'), None),
+    DataSource('screener.in', 'www.screener.in', ('price', 'pe_ratio'), None),
+)
+FIELDS = ('price', 'pe_ratio')
+
+
+def test_merge_takes_each_field_from_the_highest_priority_source():
+    results = {
+        'finlive.in': {'pe_ratio': 'N/A'},
+        'trendlyne.com': {'price': '24812.45', 'pe_ratio': '22.41'},
+        'screener.in': {'price': '24809.10', 'pe_ratio': '22.36'},
+    }
+    assert merge_in_priority(SOURCES, results, FIELDS) == {
+        'price': ('24812.45', 'trendlyne.com'),
+        'pe_ratio': ('22.41', 'trendlyne.com'),
+    }
+
+
+def test_pending_source_blocks_lower_priority_values():
+    results = {'screener.in': {'price': '24809.10', 'pe_ratio': '22.36'}}
+    # finlive could still supply pe_ratio, trendlyne either field
+    assert merge_in_priority(SOURCES, results, FIELDS, pending={'finlive.in', 'trendlyne.com'}) == {}
+    # With only finlive outstanding, price is settled but pe_ratio still waits
+    assert merge_in_priority(SOURCES, results, FIELDS, pending={'finlive.in'}) == {
+        'price': ('24809.10', 'screener.in'),
+    }
+    results['trendlyne.com'] = {'price': '24812.45', 'pe_ratio': 'Error'}
+    assert merge_in_priority(SOURCES, results, FIELDS, pending={'finlive.in'}) == {
+        'price': ('24812.45', 'trendlyne.com'),
+    }
+
+
+def _fetcher(behaviour):
+    """fetch(source) over fake sources: behaviour maps name to (seconds, data)"""
+    def fetch(source):
+        seconds, data = behaviour[source.name]
+        time.sleep(seconds)
+        if isinstance(data, Exception):
+            raise data
+        return data
+    return fetch
+
+
+def test_collect_waits_for_a_slower_higher_priority_source():
+    fetch = _fetcher({
+        'finlive.in': (0.2, {'pe_ratio': '22.38'}),
+        'trendlyne.com': (0.0, {'price': '24812.45', 'pe_ratio': '22.41'}),
+        'screener.in': (0.0, RuntimeError('boom')),
+    })
+    filled, results = collect_concurrently(SOURCES, fetch, FIELDS, time.monotonic() + 5)
+    assert filled == {'price': ('24812.45', 'trendlyne.com'), 'pe_ratio': ('22.38', 'finlive.in')}
+    assert results['screener.in'] == {}
+
+
+def test_collect_stops_once_every_field_is_settled():
+    fetch = _fetcher({
+        'finlive.in': (0.0, {'pe_ratio': '22.38'}),
+        'trendlyne.com': (0.0, {'price': '24812.45', 'pe_ratio': '22.41'}),
+        'screener.in': (2.0, {'price': '24809.10', 'pe_ratio': '22.36'}),
+    })
+    t0 = time.monotonic()
+    filled, results = collect_concurrently(SOURCES, fetch, FIELDS, t0 + 5)
+    assert time.monotonic() - t0 < 1
+    assert filled == {'price': ('24812.45', 'trendlyne.com'), 'pe_ratio': ('22.38', 'finlive.in')}
+    assert 'screener.in' not in results
+
+
+def test_collect_gives_up_at_the_deadline():
+    fetch = _fetcher({
+        'finlive.in': (2.0, {'pe_ratio': '22.38'}),
+        'trendlyne.com': (0.0, {'price': 'N/A', 'pe_ratio': 'N/A'}),
+        'screener.in': (0.0, {'price': '24809.10', 'pe_ratio': '22.36'}),
+    })
+    t0 = time.monotonic()
+    filled, results = collect_concurrently(SOURCES, fetch, FIELDS, t0 + 0.3)
+    assert time.monotonic() - t0 < 1
+    # finlive never answered, so the lower-priority pe_ratio is used after all
+    assert filled == {'price': ('24809.10', 'screener.in'), 'pe_ratio': ('22.36', 'screener.in')}
+    assert 'finlive.in' not in results
+
+
+def test_retry_only_asks_sources_for_missing_fields_within_the_host_budget():
+    calls = []
+
+    def fetch(source, attempt):
+        calls.append((source.name, attempt))
+        return {'price': 'N/A', 'pe_ratio': 'N/A'}
+
+    filled = {'price': ('24812.45', 'trendlyne.com')}
+    delays = []
+    retry_missing(SOURCES, fetch, FIELDS, filled, time.monotonic() + 5, attempts=3, host_budget=2,
+                  base_delay=0.0, sleep=delays.append)
+    assert filled == {'price': ('24812.45', 'trendlyne.com')}
+    # Every source can supply pe_ratio; each host is retried twice, then the budget is spent
+    assert sorted(calls) == sorted((name, attempt) for name in ('finlive.in', 'trendlyne.com', 'screener.in')
+                                   for attempt in (1, 2))
+    assert len(delays) == 2
+
+
+def test_retry_stops_once_the_field_is_found():
+    calls = []
+
+    def fetch(source, attempt):
+        calls.append(source.name)
+        return {'pe_ratio': '22.38'} if source.name == 'finlive.in' else {}
+
+    filled = {'price': ('24812.45', 'trendlyne.com')}
+    retry_missing(SOURCES, fetch, FIELDS, filled, time.monotonic() + 5, base_delay=0.0, sleep=lambda s: None)
+    assert filled['pe_ratio'] == ('22.38', 'finlive.in')
+    assert len(calls) == 3
@@ -0,0 +1,93 @@
+import time
+
+from fanout import DataSource, collect_hedged
+
+SOURCES = (
+    DataSource('finlive.in', 'www.finlive.in', ('pe_ratio',), None),
+    DataSource('trendlyne.com', 'trendlyne.com', ('price', 'pe_ratio'), None),
+    DataSource('screener.in', 'www.screener.in', ('price', 'pe_ratio'), None),
+    DataSource('Yahoo Finance API', 'query1.finance.yahoo.com', ('price',), None),
+)
+
+
+def _run(behaviour, fields=('price', 'pe_ratio'), hedge_after=0.3):
+    """collect_hedged over fake sources: behaviour maps name to (seconds, data)"""
+    started = {}
+    t0 = time.monotonic()
+
+    def fetch(source):
+        started[source.name] = time.monotonic() - t0
+        seconds, data = behaviour[source.name]
+        time.sleep(seconds)
+        return data
+
+    filled, results = collect_hedged(SOURCES, fetch, fields, t0 + 5, lambda source: hedge_after)
+    return filled, started
+
+
+def test_fast_primary_is_the_only_request():
+    ok = {'price': '24812.45', 'pe_ratio': '22.41'}
+    filled, started = _run({name: (0.01, ok) for name in ('finlive.in', 'trendlyne.com', 'screener.in',
+                                                          'Yahoo Finance API')}, fields=('pe_ratio',))
+    assert list(started) == ['finlive.in']
+    assert filled == {'pe_ratio': ('22.41', 'finlive.in')}
+
+
+def test_answer_does_not_start_another_source_while_one_in_flight_covers_the_gap():
+    filled, started = _run({
+        'finlive.in': (0.35, {'pe_ratio': '22.38'}),  # slow: trendlyne is hedged in at 0.3
+        'trendlyne.com': (0.2, {'price': '24812.45', 'pe_ratio': '22.41'}),  # answers at 0.5, before its 0.6 hedge
+        'screener.in': (0.01, {'price': '24809.10', 'pe_ratio': '22.36'}),
+        'Yahoo Finance API': (0.01, {'price': '24810.00'}),
+    })
+    # finlive answering at 0.35 leaves price missing, but trendlyne is already fetching it
+    assert list(started) == ['finlive.in', 'trendlyne.com']
+    assert 0.25 < started['trendlyne.com'] < 0.35
+    assert filled == {'price': ('24812.45', 'trendlyne.com'), 'pe_ratio': ('22.38', 'finlive.in')}
+
+
+def test_failed_answer_moves_on_at_once():
+    filled, started = _run({
+        'finlive.in': (0.01, {'pe_ratio': 'Error'}),
+        'trendlyne.com': (0.01, {'price': '24812.45', 'pe_ratio': '22.41'}),
+        'screener.in': (0.01, {}),
+        'Yahoo Finance API': (0.01, {}),
+    })
+    assert list(started) == ['finlive.in', 'trendlyne.com']
+    assert started['trendlyne.com'] < 0.2
+    assert filled['pe_ratio'] == ('22.41', 'trendlyne.com')
+
+
+def test_slow_source_is_hedged_after_its_delay():
+    filled, started = _run({
+        'finlive.in': (1.0, {'pe_ratio': '22.38'}),
+        'trendlyne.com': (0.01, {'price': '24812.45', 'pe_ratio': '22.41'}),
+        'screener.in': (0.01, {}),
+        'Yahoo Finance API': (0.01, {}),
+    }, hedge_after=0.2)
+    assert list(started) == ['finlive.in', 'trendlyne.com']
+    assert 0.15 < started['trendlyne.com'] < 0.4
+    assert filled['pe_ratio'] == ('22.41', 'trendlyne.com')
+
+
+def test_cache_hits_do_not_shorten_the_hedge_delay(state_dir, page_server):
+    from market_scraper import MarketDataScraper, MMI_SOURCES
+
+    scraper = MarketDataScraper()
+    scraper.session.politeness = None
+    source = MMI_SOURCES[0]
+
+    def slow_page():
+        response = scraper.session.get(page_server.url)
+        if not getattr(response, 'from_cache', False):
+            time.sleep(0.2)
+        return {'value': 47, 'source': source.name}
+
+    scraper.get_mmi_data_from_tickertape = slow_page
+    for _ in range(20):
+        scraper._fetch_source(source)
+
+    # One network fetch and 19 cache hits: all count, only one latency sample
+    assert len(page_server.requests) == 1
+    assert scraper.health.stats(source.name)['calls'] == 20
+    assert scraper._hedge_delay(source) >= 0.2
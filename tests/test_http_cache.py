@@ -0,0 +1,55 @@
+import time
+
+from http_cache import HTTPCache, CachedSession
+
+
+def _session(tmp_path, ttl):
+    return CachedSession(HTTPCache(str(tmp_path / 'http')), default_ttl=ttl)
+
+
+def test_fresh_entry_is_served_without_a_request(tmp_path, page_server):
+    session = _session(tmp_path, ttl=300)
+    assert session.get(page_server.url).text == 'version 1'
+    response = session.get(page_server.url)
+    assert response.text == 'version 1'
+    assert response.from_cache
+    assert len(page_server.requests) == 1
+
+
+def test_stale_entry_is_revalidated_with_its_etag(tmp_path, page_server):
+    session = _session(tmp_path, ttl=0)
+    session.get(page_server.url)
+    stored_at = session.cache.lookup(page_server.url)[0]['stored_at']
+
+    response = session.get(page_server.url)
+    assert page_server.requests[-1]['If-None-Match'] == '"v1"'
+    # The 304 is answered from the cache and the entry counts as fresh again
+    assert response.status_code == 200
+    assert response.text == 'version 1'
+    assert response.from_cache
+    assert session.cache.lookup(page_server.url)[0]['stored_at'] > stored_at
+
+
+def test_changed_page_replaces_the_entry(tmp_path, page_server):
+    session = _session(tmp_path, ttl=0)
+    session.get(page_server.url)
+    page_server.body = b'version 2'
+    page_server.etag = '"v2"'
+
+    response = session.get(page_server.url)
+    assert response.text == 'version 2'
+    assert not getattr(response, 'from_cache', False)
+    entry, body = session.cache.lookup(page_server.url)
+    assert entry['etag'] == '"v2"'
+    assert body == b'version 2'
+
+
+def test_entry_goes_stale_after_its_ttl(tmp_path, page_server):
+    session = _session(tmp_path, ttl=0.2)
+    session.get(page_server.url)
+    session.get(page_server.url)
+    assert len(page_server.requests) == 1
+    time.sleep(0.3)
+    session.get(page_server.url)
+    assert len(page_server.requests) == 2
+    assert page_server.requests[-1]['If-None-Match'] == '"v1"'
@@ -0,0 +1,68 @@
+import fanout
+from http_cache import HTTPCache, CachedSession
+from market_scraper import MarketDataScraper, MMI_SOURCES
+
+
+def test_bypass_cache_goes_over_the_wire(tmp_path, page_server):
+    session = CachedSession(HTTPCache(str(tmp_path / 'http')), default_ttl=300)
+    assert session.get(page_server.url).text == 'version 1'
+
+    page_server.body = b'version 2'
+    page_server.etag = '"v2"'
+    assert session.get(page_server.url).text == 'version 1'  # fresh cache hit
+    with session.bypass_cache():
+        response = session.get(page_server.url)
+    assert response.text == 'version 2'
+    assert not getattr(response, 'from_cache', False)
+    assert 'If-None-Match' not in page_server.requests[-1]
+    # The fresh copy replaced the cached one
+    assert session.get(page_server.url).text == 'version 2'
+    assert len(page_server.requests) == 2
+
+
+def _stub_sources(scraper, calls):
+    def source(name, data):
+        def fetch():
+            calls.append(name)
+            return dict(data, source=name)
+        return fetch
+
+    scraper.get_nifty_data_from_finlive = source('finlive.in', {'pe_ratio': '22.38'})
+    scraper.get_nifty_data_from_trendlyne = source('trendlyne.com', {'price': '24812.45', 'pe_ratio': '22.41'})
+    scraper.get_nifty_data_from_screener = source('screener.in', {'price': '24809.10', 'pe_ratio': '22.36'})
+    scraper.get_nifty_data_from_api = source('Yahoo Finance API', {'price': '24810.00', 'pe_ratio': 'N/A'})
+    scraper.get_mmi_data_from_tickertape = source('tickertape.in', {'value': 'Error'})
+    scraper.get_mmi_data_from_goodreturns = source('goodreturns.in', {'value': 'N/A'})
+
+
+def test_one_failing_run_does_not_open_the_circuit(state_dir, monkeypatch):
+    monkeypatch.setattr(fanout, 'backoff_delay', lambda *args, **kwargs: 0.0)
+    scraper = MarketDataScraper()
+    calls = []
+    _stub_sources(scraper, calls)
+
+    nifty_data, mmi_data = scraper.retry_missing_fields(*scraper.scrape_all())
+
+    assert mmi_data['value'] == 'N/A'
+    # Both MMI sources were retried, but each run counts once against them
+    assert calls.count('tickertape.in') > 1
+    for source in MMI_SOURCES:
+        stats = scraper.health.stats(source.name)
+        assert stats['calls'] == 1
+        assert not stats['circuit_open']
+        assert scraper.health.allow(source.name)
+
+
+def test_retry_success_is_recorded(state_dir, monkeypatch):
+    monkeypatch.setattr(fanout, 'backoff_delay', lambda *args, **kwargs: 0.0)
+    scraper = MarketDataScraper()
+    calls = []
+    _stub_sources(scraper, calls)
+    answers = iter(['Error', '47'])
+    scraper.get_mmi_data_from_tickertape = lambda: {'value': next(answers, '47'), 'source': 'tickertape.in'}
+
+    nifty_data, mmi_data = scraper.retry_missing_fields(*scraper.scrape_all())
+
+    assert mmi_data['value'] == '47'
+    stats = scraper.health.stats('tickertape.in')
+    assert stats['calls'] == 2 and not stats['circuit_open']
@@ -0,0 +1,63 @@
+import time
+
+from source_health import SourceHealth
+
+
+def _health(tmp_path, **kwargs):
+    return SourceHealth(str(tmp_path / 'health.json'), cooldown=100, max_cooldown=300, **kwargs)
+
+
+def test_circuit_opens_after_consecutive_failures(tmp_path):
+    health = _health(tmp_path)
+    for _ in range(2):
+        health.record('nse', False, 1.0)
+    assert health.allow('nse')
+    health.record('nse', False, 1.0)
+    assert not health.allow('nse')
+    assert health.stats('nse')['circuit_open']
+
+
+def test_success_resets_the_failure_count(tmp_path):
+    health = _health(tmp_path)
+    for success in (False, False, True, False, False):
+        health.record('nse', success, 1.0)
+    assert health.allow('nse')
+
+
+def test_half_open_probe_closes_or_doubles_the_cooldown(tmp_path):
+    health = _health(tmp_path)
+    for _ in range(3):
+        health.record('nse', False, 1.0)
+    now = time.time()
+    assert not health.allow('nse', now=now + 99)
+    assert health.allow('nse', now=now + 101)  # cool-down over: the next call is a probe
+
+    # A failed probe re-opens the circuit for twice as long
+    health.record('nse', False, 1.0)
+    now = time.time()
+    assert not health.allow('nse', now=now + 199)
+    assert health.allow('nse', now=now + 201)
+
+    # ... capped at max_cooldown
+    health.record('nse', False, 1.0)
+    health.record('nse', False, 1.0)
+    now = time.time()
+    assert not health.allow('nse', now=now + 299)
+    assert health.allow('nse', now=now + 301)
+
+    # A successful probe closes it and restores the base cool-down
+    health.record('nse', True, 1.0)
+    assert health.allow('nse')
+    assert not health.stats('nse')['circuit_open']
+    for _ in range(3):
+        health.record('nse', False, 1.0)
+    now = time.time()
+    assert health.allow('nse', now=now + 101)
+
+
+def test_record_survives_a_reload(tmp_path):
+    health = _health(tmp_path)
+    for _ in range(3):
+        health.record('nse', False, 1.0)
+    health.save()
+    assert not _health(tmp_path).allow('nse')
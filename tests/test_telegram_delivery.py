@@ -0,0 +1,15 @@
+from telegram_delivery import TokenBucket
+
+
+def test_token_bucket_spaces_out_calls_beyond_its_burst():
+    bucket = TokenBucket(rate=10, capacity=2)
+    waits = [bucket.reserve() for _ in range(4)]
+    assert waits[:2] == [0.0, 0.0]
+    assert 0.08 < waits[2] <= 0.1
+    assert 0.18 < waits[3] <= 0.2
+
+
+def test_paused_bucket_holds_off_the_next_call():
+    bucket = TokenBucket(rate=10, capacity=5)
+    bucket.pause(2)
+    assert 2.0 < bucket.reserve() <= 2.1